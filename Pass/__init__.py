@@ -2,7 +2,9 @@
 from __future__ import unicode_literals
 import os
 import sys
-from base import read_from_file, read_from_string, write_to_file, write_to_stdout, process_pass
+from base import (read_from_file, read_from_string, write_to_file, write_to_stdout, process_pass,
+                  generate_css, compile_string, compile_file, make_css_from_statements, iter_chunks,
+                  write_to_stream, StageRegistry, pipeline_stages)
 
 __version__ = (1, 0, 5)
 
@@ -10,35 +12,39 @@ __version__ = (1, 0, 5)
 class Pass(object):
 
     def __init__(self, filename, compressed=True, empty_selectors=True, respect_indents=False,
-                 inherit_selectors=False, indent='  ', css_indent='    ', newlines=True):
+                 inherit_selectors=False, indent='  ', css_indent='    ', newlines=True, cache=None, stages=None):
         try:
             process_pass(filename, compressed, empty_selectors, respect_indents,
-                         inherit_selectors, indent, css_indent, newlines)
-        except (SyntaxError, IndentationError) as e:
-            self._print_error(e, e.filename, e.lineno, getattr(e, 'msg', e.message))
-        except (ValueError, IOError) as e:
-            try:
-                self._print_error(e, e.args[1][0], e.args[1][1], e.args[0])
-            except IndexError:
-                print e.args
-
-    def _print_error(self, e, filename, n, msg):
-        name = e.__class__.__name__
-        try:
-            with open(filename) as f:
-                margin = 1
-                lines = []
-                for i, line in enumerate(f):
-                    if n - margin <= i + 1 <= n + margin:
-                        lines.append(line)
-                m = len(lines)/2 + 1
-                tab = lines[m][:len(lines[m]) - len(lines[m].lstrip())]
-                lines = ''.join(lines[:m] + [tab + '^\n'] + lines[m:])
-                sys.stderr.write('File "%s", line %s\n%s%s: %s\n' % (os.path.normpath(filename), n, lines, name, msg))
-                sys.exit(1)
-        except IOError:
-            sys.stderr.write('File "%s", line %s\n%s%s: %s\n' % (os.path.normpath(filename), n, None, name, msg))
+                         inherit_selectors, indent, css_indent, newlines, cache, stages=stages)
+        except (SyntaxError, IndentationError, ValueError, IOError) as e:
+            sys.stderr.write(format_error(e))
             sys.exit(1)
 
+
+def format_error(e):
+    """Returns traceback like message of .pass compilation error."""
+    name = e.__class__.__name__
+    if isinstance(e, SyntaxError):
+        filename, n, msg = e.filename, e.lineno, getattr(e, 'msg', e.message)
+    else:
+        try:
+            filename, n, msg = e.args[1][0], e.args[1][1], e.args[0]
+        except (IndexError, TypeError):
+            return '%s: %s\n' % (name, e)
+    try:
+        with open(filename) as f:
+            margin = 1
+            lines = []
+            for i, line in enumerate(f):
+                if n - margin <= i + 1 <= n + margin:
+                    lines.append(line)
+            m = n - max(n - margin, 1) + 1
+            tab = lines[m - 1][:len(lines[m - 1]) - len(lines[m - 1].lstrip())]
+            lines = ''.join(lines[:m] + [tab + '^\n'] + lines[m:])
+            return 'File "%s", line %s\n%s%s: %s\n' % (os.path.normpath(filename), n, lines, name, msg)
+    except (IOError, TypeError, IndexError):
+        return 'File "%s", line %s\n%s: %s\n' % (filename and os.path.normpath(filename), n, name, msg)
+
+
 def get_version():
-    return '.'.join(map(str, __version__))
\ No newline at end of file
+    return '.'.join(map(str, __version__))
@@ -1,22 +1,34 @@
 # encoding: utf-8
 from __future__ import unicode_literals, with_statement
 
+import io
 import os
 import re
 import sys
+import mmap
 import codecs
+import hashlib
+import threading
 from itertools import cycle, chain
 from copy import deepcopy
 
-from utils import last, consumer, vendor_prefixed_properties
-from units import Em, Pr, Pt, Cm, Mm, Px, Pc, Ex, In, unit_pattern
-from colors import color_pattern, Color
+from utils import last, consumer, vendor_prefixed_properties, property_families
+from units import Em, Pr, Pt, Cm, Mm, Px, Pc, Ex, In
+from colors import Color
 from functions import round_, lighten, darken, desaturate, saturate
+from expressions import expressions
+
+try:
+    from minify import minify
+except ImportError:
+    def minify(css, wrap=None):
+        pass
 
 IMPORT_TOKEN = 2
 MEDIA_TOKEN = 3
+# files of this size and larger are decoded straight from a memory map
+MMAP_SIZE = 1 << 20
 
-_globals = {'__builtins__': None}
 _reserved = {
     'auto': 'auto', 'none': 'none', 'solid': 'solid', 'dotted': 'dotted',
     'inherit': 'inherit',
@@ -29,6 +41,11 @@ _reserved = {
 _locals = deepcopy(_reserved)
 
 
+def make_scope():
+    """Returns variables scope of a single compilation."""
+    return dict(_reserved)
+
+
 @consumer
 def null():
     yield
@@ -39,28 +56,58 @@ def null():
             pass
 
 
+def read_text(filename):
+    """Returns decoded contents of the file, read at once or memory mapped when it is large."""
+    with io.open(filename, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < MMAP_SIZE:
+            return f.read().decode('utf-8')
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return codecs.utf_8_decode(data, 'strict', True)[0]
+        finally:
+            data.close()
+
+
 def read_from_file(filename):
-    with codecs.open(filename, 'rb+', 'utf-8') as f:
-        for n, line in enumerate(f, start=1):
-            yield f.name, n, line.rstrip()
+    for n, line in enumerate(read_text(filename).splitlines(), start=1):
+        yield filename, n, line.rstrip()
 
 
-def read_from_string(string):
+def read_from_string(string, filename=None):
     for n, line in enumerate(string.splitlines(), start=1):
-        yield None, n, line.rstrip()
+        yield filename, n, line.rstrip()
+
+
+def end_of_line(newlines=True, compressed=True):
+    return '\n' if newlines else '' if compressed else '\n'
+
+
+def iter_chunks(lines, newlines=True, compressed=True, encoding=None):
+    """Yields css lines with line ends, encoded to bytes when `encoding` is given."""
+    end_of_line_ = end_of_line(newlines, compressed)
+    if encoding:
+        for line in lines:
+            yield (line + end_of_line_).encode(encoding)
+    else:
+        for line in lines:
+            yield line + end_of_line_
+
+
+def write_to_stream(lines, stream, newlines=True, compressed=True, encoding='utf-8'):
+    """Writes css lines to text or binary file-like object as they are generated."""
+    text = isinstance(stream, (io.TextIOBase, codecs.StreamWriter))
+    for chunk in iter_chunks(lines, newlines, compressed, None if text else encoding):
+        stream.write(chunk)
 
 
 def write_to_file(lines, filename, newlines=True, compressed=True):
     filename, ext = os.path.splitext(filename)
-    end_of_line = ('\n' if newlines else '' if compressed else '\n')
-    with codecs.open(filename + '.css', 'wb+', 'utf-8') as f:
-        for line in lines:
-            f.write(line + end_of_line)
+    with open(filename + '.css', 'wb') as f:
+        write_to_stream(lines, f, newlines, compressed)
 
 
-def write_to_stdout(lines):
-    for line in lines:
-        sys.stdout.write(line)
+def write_to_stdout(lines, newlines=True, compressed=True):
+    write_to_stream(lines, sys.stdout, newlines, compressed, getattr(sys.stdout, 'encoding', None) or 'utf-8')
 
 
 @consumer
@@ -78,7 +125,7 @@ def import_pass_file(lines):
         pass
 
 
-def first_line_update_by_parent(lines, target, *args, **kwargs):
+def first_line_update_by_parent(lines, target, parents):
     first = True
     for f, n, line in lines:
         if line[:7] == '@parent':
@@ -95,12 +142,11 @@ def first_line_update_by_parent(lines, target, *args, **kwargs):
             filename += ext if ext else '.pass'
             if filename == f:
                 raise SyntaxError('parent file is self file', (f, n, None, None))
-            path = os.path.join(os.path.dirname(f), filename)
+            path = os.path.join(os.path.dirname(f or ''), filename)
             if not os.path.exists(path):
                 raise IOError('file %s not exists' % filename, (f, n, None, None))
             target.send((f, n, line))
-            os.remove(os.path.splitext(f)[0] + '.css')
-            process_pass(path, *args, **kwargs)
+            parents.append(path)
             lines.close()
         else:
             yield f, n, line
@@ -123,77 +169,74 @@ def ignore_line_comments(lines, target):
             yield f, n, line
 
 
-def ignore_block_comments(lines, target):
-    comment = False
+def strip_block_comments(line, comment=False):
+    """Removes block comment parts of the line. Returns stripped line and whether comment continues."""
     start = '/*'
     end = '*/'
     iterable = ((True, start, end), (False, end, start))
+    chunks = ''
+    head, tail = line, ''
+    for t, a, b in cycle(reversed(iterable) if comment else iterable):
+        head, _, tail = head.partition(a)
+        if b not in tail:
+            comment = t
+            break
+        if t:
+            chunks += head
+        head = tail
+    line = chunks + (head if comment else tail)
+    return line.rstrip(), comment
+
+
+def ignore_block_comments(lines, target):
+    comment = False
     for f, n, line in lines:
-        if not comment and start in line:
-            comment = True
-            chunks = ''
-            head, tail = line, ''
-            for t, a, b in cycle(iterable):
-                head, _, tail = head.partition(a)
-                if b not in tail:
-                    comment = t
-                    break
-                if t:
-                    chunks += head
-                head = tail
-            line = chunks + (head if comment else tail)
-            line = line.rstrip()
-            if line:
-                yield f, n, line
+        if comment and '*/' not in line:
             target.send((f, n, line))
-        elif comment and end in line:
-            comment = False
-            chunks = ''
-            head, tail = line, ''
-            for t, a, b in cycle(reversed(iterable)):
-                head, _, tail = head.partition(a)
-                if b not in tail:
-                    comment = t
-                    break
-                if t:
-                    chunks += head
-                head = tail
-            line = chunks + (head if comment else tail)
-            line = line.rstrip()
+        elif comment or '/*' in line:
+            line, comment = strip_block_comments(line, comment)
             if line:
                 yield f, n, line
             target.send((f, n, line))
-        elif comment:
-            target.send((f, n, line))
         else:
             yield f, n, line
 
 
-def define_variables(lines, target):
+def parse_variable(f, n, line):
+    """Returns variable and value of `variable = value` line or None if line is not a variable definition."""
+    variable, _, value = line.partition('=')
+    variable, value = variable.rstrip(), value.lstrip()
+    if not variable or not value:
+        raise SyntaxError('variable or value not defined', (f, n, None, line))
+    elif ',' in variable:
+        raise SyntaxError('multiple assignments not allowed', (f, n, None, line))
+    elif variable[:1].isspace():
+        raise IndentationError('unresolved variable indent', (f, n, None, line))
+    elif variable.replace('_', '').isalnum():
+        if variable[0].isdigit():
+            raise SyntaxError('variable can\'t start with digit', (f, n, None, line))
+        elif variable in _reserved:
+            raise SyntaxError('variable uses reserved word', (f, n, None, line))
+        return variable, value
+
+
+def define_variable(f, n, line, scope=_locals):
+    """Evaluates `variable = value` line into the scope. Returns False if line is not a variable definition."""
+    definition = parse_variable(f, n, line)
+    if definition is None:
+        return False
+    variable, value = definition
+    try:
+        scope[variable] = expressions(value).evaluate(scope)
+    except (TypeError, SyntaxError, ValueError, NameError) as e:
+        raise SyntaxError(e.message + ': %s' % line.strip(), (f, n, None, line))
+    return True
+
+
+def define_variables(lines, target, scope=_locals):
     for f, n, line in lines:
-        if '=' in line:
-            variable, _, value = line.partition('=')
-            variable, value = variable.rstrip(), value.lstrip()
-            if not variable or not value:
-                raise SyntaxError('variable or value not defined', (f, n, None, line))
-            elif ',' in variable:
-                raise SyntaxError('multiple assignments not allowed', (f, n, None, line))
-            elif variable[:1].isspace():
-                raise IndentationError('unresolved variable indent', (f, n, None, line))
-            elif variable.replace('_', '').isalnum():
-                if variable[0].isdigit():
-                    raise SyntaxError('variable can\'t start with digit', (f, n, None, line))
-                elif variable in _reserved:
-                    raise SyntaxError('variable uses reserved word', (f, n, None, line))
-                exec_line = variable + ' = ' + color_pattern(unit_pattern(value))
-                try:
-                    exec exec_line in _globals, _locals
-                except (TypeError, SyntaxError, ValueError) as e:
-                    raise SyntaxError(e.message + ': %s' % exec_line, (f, n, None, line))
-                else:
-                    target.send((f, n, line))
-            else:
-                yield f, n, line
+        if '=' in line and define_variable(f, n, line, scope):
+            target.send((f, n, line))
         else:
             yield f, n, line
 
@@ -237,8 +280,71 @@ def tokenize_selectors_and_properties(lines, indent='  '):
         yield None, 0, '', 0, -level, True, sel
 
 
+# indent, then line comment, property name or nothing else on the line
+line_pattern = re.compile(r'(\s*)(?:(//)|(-?[_a-z][_a-z0-9-]*[ \t\n\r\f\v])|(\Z))?', re.UNICODE)
+
+
+def lex(lines, scope=_locals, indent='  ', target=None, define=define_variable):
+    """
+    Single pass equivalent of ignore_empty_lines, ignore_line_comments, ignore_block_comments,
+    define_variables and tokenize_selectors_and_properties yielding tokens of the latter.
+    Trivia lines (blank lines, comments and variable definitions) are sent to `target` on request only.
+    Variable definitions are handled by `define(f, n, line, scope)`.
+    """
+    match = line_pattern.match
+    indent_length = len(indent)
+    _level, level = -1, None
+    _sel, sel = True, None
+    comment = False
+    for f, n, line in lines:
+        m = match(line)
+        length, line_comment, prop, blank = m.group(1, 2, 3, 4)
+        if blank is not None and n != 0 or line_comment or comment and '*/' not in line:
+            if target is not None:
+                target.send((f, n, line))
+            continue
+        if comment or '/*' in line:
+            line, comment = strip_block_comments(line, comment)
+            if target is not None:
+                target.send((f, n, line))
+            if not line:
+                continue
+            m = match(line)
+            length, prop = m.group(1, 3)
+        if '=' in line and define(f, n, line, scope):
+            if target is not None:
+                target.send((f, n, line))
+            continue
+        length = len(length)
+        if '\t' in line[:length]:
+            _level -= 1
+        line = line[length:]
+        level = length / indent_length + length % indent_length * indent_length
+        behind = level - _level
+        if prop is not None:
+            sel = False
+            key, _, value = line.partition(' ')
+            line = (key, value.lstrip())
+        elif line == 'clearfix':
+            sel = False
+            line = 'clearfix', ''
+        elif line == 'pass':
+            sel = False
+        elif line[:7] == '@import':
+            sel = IMPORT_TOKEN
+        elif line[:6] == '@media':
+            sel = MEDIA_TOKEN
+        else:
+            sel = True
+        yield f, n, line, level, behind, sel, _sel
+        _level, _sel = level, sel
+    if level is not None:
+        yield None, 0, '', 0, -level, True, sel
+
+
 def check_indentation_errors(lines):
-    for f, n, name, level, behind, sel, _sel in lines:
+    for token in lines:
+        f, n, name, level, behind, sel, _sel = token
         if n == 0 and (_sel is True or _sel == MEDIA_TOKEN):
             raise IndentationError('expected an indented property 0', (f, n, None, name))
         elif behind > 1:
@@ -253,12 +359,13 @@ def check_indentation_errors(lines):
             raise IndentationError('expected an indented property 3', (f, n, None, name))
         elif not sel and not _sel and behind != 0:
             raise IndentationError('expected an indented property 4 ', (f, n, None, name))
-        yield f, n, name, level, behind, sel, _sel
+        yield token
 
 
 def check_imports_syntax(lines):
     selector, first = False, True
-    for f, n, name, level, behind, sel, _sel in lines:
+    for token in lines:
+        f, n, name, level, behind, sel, _sel = token
         if sel == IMPORT_TOKEN:
             if not first and n > 0 and _sel and not selector:
                 raise IndentationError('unexpected indented selector 0', (f, n, None, name))
@@ -271,31 +378,134 @@ def check_imports_syntax(lines):
             raise IndentationError('unexpected indented property', (f, n, None, name))
         else:
             selector = False
-        yield f, n, name, level, behind, sel, _sel
+        yield token
         first = False
 
 
-def import_files(lines, target):
+def lex_partial(filename, indent='  '):
+    """
+    Returns lexed and checked tokens of the imported .pass file for replay by `import_files`.
+    Tokens are `(f, n, name, level, tab, sel)`, where `tab` is indentation adjustment of the level,
+    variable definitions stay in place as `(f, n, line, None, 0, None)` to be evaluated on replay.
+    """
+    tokens = []
+
+    def define(f, n, line, scope):
+        if parse_variable(f, n, line) is None:
+            return False
+        tokens.append((f, n, line, None, 0, None))
+        return True
+
+    def skip_parents(lines):
+        for f, n, line in lines:
+            if line[:7] == '@parent':
+                if line[7:8] != ' ':
+                    raise SyntaxError('@parent syntax error', (f, n, None, None))
+                continue
+            yield f, n, line
+
+    _level = -1
+    lines = lex(skip_parents(read_from_file(filename)), indent=indent, define=define)
+    for f, n, name, level, behind, sel, _sel in check_imports_syntax(check_indentation_errors(lines)):
+        if n:
+            tokens.append((f, n, name, level, behind - level + _level, sel))
+            _level = level
+    return tuple(tokens)
+
+
+class PartialCache(object):
+    """
+    Thread safe process wide cache of lexed imported .pass files,
+    keyed by path and indentation and invalidated by modification time and size of the file.
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, filename, indent='  '):
+        stat = os.stat(filename)
+        key, version = (os.path.abspath(filename), indent), (stat.st_mtime, stat.st_size)
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None and item[0] == version:
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+        tokens = lex_partial(filename, indent)
+        with self.lock:
+            self.items[key] = version, tokens
+        return tokens
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.hits = self.misses = 0
+
+
+partials = PartialCache()
+
+
+def replay_partial(tokens, lines, scope, level, sel):
+    """
+    Yields cached tokens of partials imported by @import token of `level` and `sel` evaluating their variables,
+    then re-bases the next token of `lines` on the last token of them, as if they were lexed in place.
+    """
+    _level, _sel = level, sel
+    for f, n, name, level_, tab, sel_ in tokens:
+        if level_ is None:
+            define_variable(f, n, name, scope)
+            continue
+        yield f, n, name, level_, level_ - _level + tab, sel_, _sel
+        _level, _sel = level_, sel_
+    for f, n, name, level_, behind, sel_, __sel in lines:
+        yield f, n, name, level_, behind + level - _level, sel_, _sel
+        break
+
+
+def import_files(lines, target, dependencies=None, scope=None, cache=None, indent='  '):
+    """
+    Sends imported .pass files to `target` to be read in place or replays them from `cache` when given,
+    yields @import blocks of .css files.
+    """
     sel_, behind_ = None, None
-    for f, n, name, level, behind, sel, _sel in lines:
+    lines = iter(lines)
+    while True:
+        try:
+            token = next(lines)
+        except StopIteration:
+            return
+        f, n, name, level, behind, sel, _sel = token
         if sel == IMPORT_TOKEN:
-            temp = []
+            temp, partial = [], ()
             for filename in name[7:].lstrip().split():
                 filename = filename.strip('"\'')
                 _, ext = os.path.splitext(filename)
-                full_path = os.path.join(os.path.dirname(f), filename)
+                full_path = os.path.join(os.path.dirname(f or ''), filename)
                 if not ext:
                     filename += '.pass'
                 if ext == '.pass':
+                    if dependencies is not None:
+                        dependencies.append(full_path)
                     if not os.path.exists(full_path):
                         raise IOError('file %s not exists' % filename, (f, n, None, None))
-                    target.send(full_path)
+                    if cache is None:
+                        target.send(full_path)
+                    else:
+                        partial += cache.get(full_path, indent)
                 elif ext == '.css':
+                    if dependencies is not None:
+                        dependencies.append(full_path)
                     if not os.path.exists(full_path):
                         raise IOError('file %s not exists' % filename, (f, n, None, None))
                     temp.append(full_path)
                 else:
                     raise IOError('unknown file extension "%s"' % filename, (f, n, None, None))
+            if partial:
+                rest = lines
+                lines = chain(replay_partial(partial, rest, scope, level, sel), rest)
             if temp:
                 if _sel == IMPORT_TOKEN:
                     behind, _sel = -1, False
@@ -308,12 +518,13 @@ def import_files(lines, target):
             yield f, n, name, level, behind_, sel, sel_
             sel_, behind_ = None, None
         else:
-            yield f, n, name, level, behind, sel, _sel
+            yield token
 
 
 def check_media_queries_syntax(lines):
     media, block = False, False
-    for f, n, name, level, behind, sel, _sel in lines:
+    for token in lines:
+        f, n, name, level, behind, sel, _sel = token
         if sel == MEDIA_TOKEN:
             if not media and _sel and behind == 0:
                 raise IndentationError('expected an indented selector 1', (f, n, None, name))
@@ -328,84 +539,149 @@ def check_media_queries_syntax(lines):
             media = False
         elif not sel and media:
             raise IndentationError('expected an indented selector', (f, n, None, name))
-        yield f, n, name, level, behind, sel, _sel
+        yield token
+
+
+fallback_pattern = re.compile(r'-(?:webkit|moz|ms|o)-|[-a-z]+(?=\()|!\s*important', re.IGNORECASE)
+
+
+def unique_properties(tokens):
+    """Returns property tokens without the overridden ones, keeping the flags of the first token first."""
+    names = [name[0] for f, n, name, level, behind, sel, _sel in tokens]
+    seen, duplicates = set(), set()
+    for prop in names:
+        (duplicates if prop in seen else seen).add(prop)
+    keys = [(prop, frozenset(m.lower() for m in fallback_pattern.findall(token[2][1])))
+            if prop in duplicates else prop for prop, token in zip(names, tokens)]
+    last = dict((key, i) for i, key in enumerate(keys))
+    unique = [token for i, token in enumerate(tokens) if last[keys[i]] == i]
+    if unique[0] is not tokens[0]:
+        f, n, name, level, behind, sel, _sel = unique[0]
+        unique[0] = f, n, name, level, tokens[0][4], sel, tokens[0][6]
+    return unique
 
 
 def filter_properties(lines):
-    unique, properties = [], []
-    for f, n, name, level, behind, sel, _sel in lines:
+    """
+    Drops declarations overridden later in the same block, the last one wins.
+    Fallbacks, whose values differ in vendor prefixes, functions or !important, are kept.
+    Runs on evaluated properties, so buffered ones don't see variables redefined after the block.
+    """
+    properties, unique = [], set()
+    _sel = True
+    for token in lines:
+        f, n, name, level, behind, sel, __sel = token
         if not sel and name != 'pass':
-            prop, expr = name
-            try:
-                index = unique.index(prop)
-            except ValueError:
-                pass
-            else:
-                if index == 0:
-                    behind, _sel = properties[index][4], True
-                del unique[index], properties[index]
-            unique.append(prop)
-            properties.append((f, n, name, level, behind, sel, _sel))
+            properties.append(token)
+            unique.add(name[0])
         elif sel:
             if not _sel:
                 if properties:
-                    for prop in properties:
+                    for prop in properties if len(unique) == len(properties) else unique_properties(properties):
                         yield prop
+                    properties, unique = [], set()
                 else:
                     yield f, n, 'pass', level - behind, 1, False, True
-                unique, properties = [], []
-            yield f, n, name, level, behind, sel, _sel
+            yield token
+        _sel = sel
 
 
-def evaluate_properties(lines):
+def evaluate_properties(lines, scope=_locals):
     props = 'width', 'height', 'top', 'left', 'color', 'background-color', 'line-height', 'max-width', 'min-width', 'border-top-color'
-    for f, n, name, level, behind, sel, _sel in lines:
+    for token in lines:
+        f, n, name, level, behind, sel, _sel = token
         if not sel and name != 'pass':
             prop, expr = name
             if prop.startswith('margin-') or prop.startswith('padding-') or prop in props:
-                expr = color_pattern(expr)
-                expr = unit_pattern(expr)
                 try:
-                    expr = str(eval(expr, _globals, _locals))
+                    expr = str(expressions(expr).evaluate(scope))
                 except SyntaxError as e:
                     raise SyntaxError(e.msg, (f, n, None, name))
                 except (NameError, AttributeError, ValueError) as e:
                     raise SyntaxError(e, (f, n, None, name))
             elif prop in ('margin', 'padding', 'border', 'flex') or prop.startswith('border-'):
-                expr = color_pattern(expr)
-                expr = unit_pattern(expr)
                 for i in range(4):
                     try:
-                        expr = ' '.join([str(eval(v, _globals, _locals)) for v in expr.split(None, i)])
+                        expr = ' '.join([str(expressions(v).evaluate(scope)) for v in expr.split(None, i)])
                     except (SyntaxError, NameError, ValueError) as e:
                         if i == 3:
                             raise SyntaxError(getattr(e, 'msg', e.message), (f, n, None, name))
                     else:
                         break
-            name = prop, expr
-        yield f, n, name, level, behind, sel, _sel
+            else:
+                yield token
+                continue
+            yield f, n, (prop, expr), level, behind, sel, _sel
+        else:
+            yield token
+
+
+class SelectorPath(object):
+    """
+    Immutable path of nested selector names sharing its prefix with the parent path.
+    Iterates and compares like the list of names.
+    """
+
+    __slots__ = ('name', 'parent')
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+
+    def names(self):
+        names = []
+        path = self
+        while path is not None:
+            names.append(path.name)
+            path = path.parent
+        names.reverse()
+        return names
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def __len__(self):
+        length, path = 0, self
+        while path is not None:
+            length, path = length + 1, path.parent
+        return length
+
+    def __getitem__(self, index):
+        return self.names()[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (SelectorPath, list, tuple)):
+            return self.names() == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return repr(self.names())
 
 
 def combine_selectors(lines):
     first = True
     stack = []
-    selectors = [[]]
+    selectors = [None]
     _level, _sel = -1, True
     for f, n, name, level, _, sel, _ in lines:
         behind = level - _level
         if sel and (_sel and behind > 0 or not _sel and behind == 0):
             stack.append(selectors)
-            selectors = [s + [name] for s in selectors]
+            selectors = [SelectorPath(name, s) for s in selectors]
         elif sel and (not _sel and behind < 0 or _sel and behind == 0):
             if not _sel:
                 stack = stack[:level + 1]
                 selectors = []
-            selectors += [s + [name] for s in stack[-1]]
+            selectors += [SelectorPath(name, s) for s in stack[-1]]
         elif not sel and (_sel and behind > 0 or not _sel and behind == 0):
             if _sel:
                 sel_ = first
                 for selector in selectors:
-                    yield deepcopy(selector), True, sel_
+                    yield selector, True, sel_
                     sel_ = True
                 first = False
             yield name, sel, _sel
@@ -428,6 +704,8 @@ def split_selectors(lines):
     for selectors, declarations in lines:
         _selectors = []
         for selector in selectors:
+            if isinstance(selector, SelectorPath):
+                selector = selector.names()
             chunks = []
             chunks.extend(selector[:1])
             for chunk in selector[1:]:
@@ -486,12 +764,15 @@ def inherit_statements(lines, respect_indents=True, inherit_selectors=False):
                             if selector not in statements[index[parent_selector_hash]][0]:
                                 statements[index[parent_selector_hash]][0].append(selector)
                     else:
-                        if declarations:
-                            keys = zip(*declarations)[0]
-                            temp = [i for i in index[parent_selector_hash] if i[0] not in keys]
-                            declarations = temp + declarations
-                        else:
-                            declarations = index[parent_selector_hash]
+                        # inherited lists are shared until overridden
+                        inherited = index[parent_selector_hash]
+                        if not declarations:
+                            declarations = inherited
+                        elif inherited:
+                            keys = set(zip(*declarations)[0])
+                            temp = [i for i in inherited if i[0] not in keys]
+                            if temp:
+                                declarations = temp + declarations
             if not respect_indents:
                 selector_hash = selector_hash.replace(indent_sep, '')
             index[selector_hash] = i if inherit_selectors else declarations
@@ -521,7 +802,11 @@ def handle_medias(lines):
 
 
 def add_vendor_prefixes_to_properties(lines):
-    for media, selectors, declarations in lines:
+    for statement in lines:
+        media, selectors, declarations = statement
+        if not any(prop in vendor_prefixed_properties for prop, expression in declarations):
+            yield statement
+            continue
         declaration_list = []
         for prop, expression in declarations:
             if prop in vendor_prefixed_properties:
@@ -531,8 +816,24 @@ def add_vendor_prefixes_to_properties(lines):
         yield media, selectors, declaration_list
 
 
+clearfix_before = [("content", '" "'), ("display", "table")]
+clearfix_after = [("content", '" "'), ("display", "table"), ("clear", "both")]
+
+
+class ClearfixDeclarations(list):
+    """Declarations of the :after statement made by `add_clearfix`, knowing selectors of the clearfix block."""
+
+    def __init__(self, declarations, selectors):
+        super(ClearfixDeclarations, self).__init__(declarations)
+        self.selectors = selectors
+
+
 def add_clearfix(lines, ie6_7=True):
-    for media, selectors, declarations in lines:
+    for statement in lines:
+        media, selectors, declarations = statement
+        if not any(prop == 'clearfix' for prop, expression in declarations):
+            yield statement
+            continue
         declaration_list = []
         _selectors = []
         for prop, expression in declarations:
@@ -542,20 +843,183 @@ def add_clearfix(lines, ie6_7=True):
                 declaration_list.append((prop, expression))
         yield media, selectors, declaration_list
         if _selectors:
-            yield media, [selector + ":before" for selector in _selectors], [("content", '" "'), ("display", "table")]
-            yield media, [selector + ":after" for selector in _selectors], [("content", '" "'), ("display", "table"), ("clear", "both")]
+            yield media, [selector + ":before" for selector in _selectors], list(clearfix_before)
+            yield media, [selector + ":after" for selector in _selectors], \
+                ClearfixDeclarations(clearfix_after, _selectors)
             if ie6_7:
                 yield media, _selectors, [("*zoom", "1")]
 
 
-def make_css_from_statements(lines, compressed=True, empty_selectors=True, indent='    ', target=None):
+def add_clearfix_ie6_7(lines):
+    """Adds IE6/7 *zoom hack after clearfix statements made by `add_clearfix(lines, ie6_7=False)`."""
+    for statement in lines:
+        media, selectors, declarations = statement
+        yield statement
+        if isinstance(declarations, ClearfixDeclarations):
+            yield media, declarations.selectors, [("*zoom", "1")]
+
+
+box_shorthands = [
+    # shorthand, longhands in its order, parts of other properties of its family not overlapping it
+    ('margin', ('margin-top', 'margin-right', 'margin-bottom', 'margin-left'), ()),
+    ('padding', ('padding-top', 'padding-right', 'padding-bottom', 'padding-left'), ()),
+    ('border-color', ('border-top-color', 'border-right-color', 'border-bottom-color', 'border-left-color'),
+     ('width', 'style', 'radius', 'image', 'collapse', 'spacing')),
+]
+css_wide_keywords = {'inherit', 'initial', 'unset', 'revert', 'revert-layer'}
+
+
+def shorten_box(declarations, shorthand, longhands, unrelated=()):
+    """
+    Returns `declarations` with complete set of `longhands` replaced by the shortest `shorthand`
+    at the place of the last of them, unless other properties of the family are declared too.
+    """
+    family = property_families(shorthand)[0]
+    values, last = {}, None
+    for i, (prop, expression) in enumerate(declarations):
+        if prop in longhands:
+            if prop in values:
+                return declarations
+            values[prop], last = str(expression), i
+        elif family in property_families(prop) and not any(part in prop for part in unrelated):
+            return declarations
+    if len(values) < 4:
+        return declarations
+    box = [values[prop] for prop in longhands]
+    if any(len(value.split()) != 1 or '!' in value for value in box) or \
+            len(set(box)) > 1 and css_wide_keywords.intersection(box):
+        return declarations
+    top, right, bottom, left = box
+    if left == right:
+        del box[3]
+        if bottom == top:
+            del box[2]
+            if right == top:
+                del box[1]
+    return [(shorthand, ' '.join(box)) if i == last else (prop, expression)
+            for i, (prop, expression) in enumerate(declarations) if i == last or prop not in longhands]
+
+
+def compact_shorthands(lines):
+    """Replaces longhands of `margin`, `padding` and `border-color` set all at once by the shortest shorthand."""
+    for statement in lines:
+        media, selectors, declarations = statement
+        _declarations = declarations
+        for shorthand, longhands, unrelated in box_shorthands:
+            if any(prop == longhands[0] for prop, expression in declarations):
+                declarations = shorten_box(declarations, shorthand, longhands, unrelated)
+        yield statement if declarations is _declarations else (media, selectors, declarations)
+
+
+# pseudo classes and elements every browser knows, a rule is dropped as a whole for an unknown selector
+safe_pseudos = frozenset([':hover', ':focus', ':active', ':visited', ':link', ':first-child', ':before', ':after'])
+pseudo_pattern = re.compile(r'::?[-\w]*')
+
+
+def mergeable(selectors, declarations):
+    """
+    Tells whether rule can share its declarations, at-rules and selectors of pseudo classes and elements
+    other than `safe_pseudos` can not.
+    """
+    return bool(selectors and declarations) and \
+        not any(s[:1] == '@' or not safe_pseudos.issuperset(pseudo_pattern.findall(s)) for s in selectors)
+
+
+def merge_rules(lines):
+    """
+    Merges selectors of rules with the same declarations into the first of them and folds adjacent rules
+    of the same selectors. A rule is only moved up over rules not declaring properties of its families,
+    so the cascade stays the same, and imported .css files may declare any of them.
+    """
+    statements = []
+    blocks = {}   # media and declarations of mergeable rule: its index in statements
+    latest = {}   # property family: index of the latest statement declaring it
+    for media, selectors, declarations in lines:
+        if selectors == ['@import']:
+            families = {'all'}
+        else:
+            families = set(family for prop, expression in declarations for family in property_families(prop))
+        if mergeable(selectors, declarations):
+            block = tuple(media), tuple((prop, str(expression)) for prop, expression in declarations)
+            i = blocks.get(block)
+            if i is not None and all(latest.get(family, -1) <= i for family in families | {'all'}) \
+                    and ('all' not in families or i == len(statements) - 1):
+                _media, _selectors, _declarations = statements[i]
+                statements[i] = _media, _selectors + [s for s in selectors if s not in _selectors], _declarations
+                continue
+            if statements and statements[-1][:2] == (media, selectors) and mergeable(*statements[-1][1:]):
+                _media, _selectors, _declarations = statements.pop()
+                _block = tuple(media), tuple((prop, str(expression)) for prop, expression in _declarations)
+                if blocks.get(_block) == len(statements):
+                    del blocks[_block]
+                declarations = _declarations + declarations
+                block = block[0], _block[1] + block[1]
+            blocks[block] = len(statements)
+        for family in families:
+            latest[family] = len(statements)
+        statements.append((media, selectors, declarations))
+    for statement in statements:
+        yield statement
+
+
+class MinifiedCache(object):
+    """
+    Thread safe process wide cache of imported .css files, minified when `minify` is given.
+    A file is read again only when its modification time or size changes, and minified again
+    only when its content hash changes too. Minified css is also kept in optional on-disk `store`,
+    a CompileCache, under the content hash.
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, minify=None, store=None):
+        """Returns minified or plain content of the file, None for an empty file."""
+        stat = os.stat(path)
+        key, version = (os.path.abspath(path), minify), (stat.st_mtime, stat.st_size)
+        with self.lock:
+            item = self.items.get(key)
+            if item is not None and item[0] == version:
+                self.hits += 1
+                return item[2]
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha1(content).hexdigest()
+        if item is not None and item[1] == digest:
+            css = item[2]
+        elif not content or minify is None:
+            css = content or None
+        else:
+            css = store.get_minified(digest) if store is not None else None
+            if css is None:
+                with self.lock:
+                    self.misses += 1
+                css = minify(content)
+                if store is not None:
+                    store.set_minified(digest, css)
+        with self.lock:
+            self.items[key] = version, digest, css
+        return css
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.hits = self.misses = 0
+
+
+minified = MinifiedCache()
+
+
+def make_css_from_statements(lines, compressed=True, empty_selectors=True, indent='    ', target=None, cache=None):
+    """
+    Yields css lines of statements, imported .css files are minified once per process
+    or once at all with optional CompileCache `cache`.
+    """
     if compressed:
         indent = ''
-        try:
-            from cssmin import cssmin
-        except ImportError:
-            def cssmin(css, wrap=None):
-                pass
     _media, _indent = [], ''
     for media, selectors, declarations in last(lines, ([], [], [])):
         if media != _media:
@@ -568,10 +1032,9 @@ def make_css_from_statements(lines, compressed=True, empty_selectors=True, inden
                 _indent = indent
         if selectors == ['@import']:
             for _, path in declarations:
-                with open(path) as f:
-                    content = f.read()
-                    if content:
-                        yield cssmin(content) if compressed else content
+                content = minified.get(path, minify if compressed else None, cache)
+                if content is not None:
+                    yield content
         elif empty_selectors or declarations:
             declarations = [_indent + indent + k + (':' if compressed else ': ') + str(v) + ';' for k, v in declarations]
             if selectors:
@@ -585,39 +1048,286 @@ def make_css_from_statements(lines, compressed=True, empty_selectors=True, inden
         _media = media
 
 
-def process_pass(filename, compressed=True, empty_selectors=True, respect_indents=False,
-                 inherit_selectors=False, indent='  ', css_indent='    ', newlines=True):
-    target = null()
-    parents = []
-    reader = read_from_file(filename)
-    importer = import_pass_file(reader)
+class Compilation(object):
+    """State of a single compilation shared by pipeline stages."""
+
+    __slots__ = ('target', 'scope', 'importer', 'parents', 'dependencies', 'compressed', 'empty_selectors',
+                 'respect_indents', 'inherit_selectors', 'indent', 'css_indent', 'cache')
+
+    def __init__(self, parents, dependencies, compressed, empty_selectors, respect_indents, inherit_selectors,
+                 indent, css_indent, cache=None):
+        self.target = null()
+        self.scope = make_scope()
+        self.importer = None
+        self.parents = parents
+        self.dependencies = dependencies
+        self.compressed = compressed
+        self.empty_selectors = empty_selectors
+        self.respect_indents = respect_indents
+        self.inherit_selectors = inherit_selectors
+        self.indent = indent
+        self.css_indent = css_indent
+        self.cache = cache
+
+
+class StageRegistry(object):
+    """
+    Ordered registry of pipeline stages.
+    Stage is a `function(lines, compilation)` returning generator of lines,
+    only optional stages can be disabled.
+    """
+
+    def __init__(self, stages=()):
+        self.stages = []
+        self.disabled = set()
+        for name, function, optional in stages:
+            self.insert(name, function, optional=optional)
+
+    def __iter__(self):
+        for name, function, optional in self.stages:
+            if name not in self.disabled:
+                yield name, function
+
+    def names(self):
+        return [name for name, function in self]
+
+    def index(self, name):
+        for i, (_name, function, optional) in enumerate(self.stages):
+            if _name == name:
+                return i
+        raise KeyError('unknown stage %s' % name)
+
+    def insert(self, name, function, before=None, after=None, optional=True):
+        """Inserts stage before or after the named stage, appends it otherwise."""
+        if any(_name == name for _name, _, _ in self.stages):
+            raise ValueError('stage %s already registered' % name)
+        if before is not None:
+            i = self.index(before)
+        elif after is not None:
+            i = self.index(after) + 1
+        else:
+            i = len(self.stages)
+        self.stages.insert(i, (name, function, optional))
+
+    def remove(self, name):
+        if not self.stages[self.index(name)][2]:
+            raise ValueError('stage %s is required' % name)
+        del self.stages[self.index(name)]
+        self.disabled.discard(name)
+
+    def disable(self, *names):
+        for name in names:
+            if not self.stages[self.index(name)][2]:
+                raise ValueError('stage %s is required' % name)
+        self.disabled.update(names)
+
+    def enable(self, *names):
+        for name in names:
+            self.index(name)
+        self.disabled.difference_update(names)
+
+    def copy(self):
+        registry = StageRegistry()
+        registry.stages = list(self.stages)
+        registry.disabled = set(self.disabled)
+        return registry
+
+
+def _import_pass_file(lines, c):
+    c.importer = import_pass_file(lines)
+    return c.importer
+
+
+def _first_line_update_by_parent(lines, c):
+    return first_line_update_by_parent(lines, c.target, c.parents)
+
+
+def _lex(lines, c):
+    return lex(lines, c.scope, c.indent)
+
+
+def _check_indentation_errors(lines, c):
+    return check_indentation_errors(lines)
+
+
+def _check_imports_syntax(lines, c):
+    return check_imports_syntax(lines)
+
+
+def _import_files(lines, c):
+    return import_files(lines, c.importer, c.dependencies, c.scope, partials, c.indent)
+
+
+def _check_media_queries_syntax(lines, c):
+    return check_media_queries_syntax(lines)
+
+
+def _evaluate_properties(lines, c):
+    return evaluate_properties(lines, c.scope)
+
+
+def _filter_properties(lines, c):
+    return filter_properties(lines)
+
+
+def _combine_selectors(lines, c):
+    return combine_selectors(lines)
+
+
+def _make_statements_list(lines, c):
+    return make_statements_list(lines)
+
+
+def _split_selectors(lines, c):
+    return split_selectors(lines)
+
+
+def _inherit_statements(lines, c):
+    return inherit_statements(lines, c.respect_indents, c.inherit_selectors)
+
+
+def _handle_medias(lines, c):
+    return handle_medias(lines)
+
+
+def _add_vendor_prefixes_to_properties(lines, c):
+    return add_vendor_prefixes_to_properties(lines)
+
+
+def _add_clearfix(lines, c):
+    return add_clearfix(lines, ie6_7=False)
+
+
+def _add_clearfix_ie6_7(lines, c):
+    return add_clearfix_ie6_7(lines)
+
+
+def _compact_shorthands(lines, c):
+    return compact_shorthands(lines)
+
+
+def _merge_rules(lines, c):
+    return merge_rules(lines)
+
+
+def _make_css_from_statements(lines, c):
+    return make_css_from_statements(lines, c.compressed, c.empty_selectors, c.css_indent, c.target, c.cache)
+
+
+pipeline_stages = StageRegistry([
     # f, n, line
-    lines = first_line_update_by_parent(importer, target, compressed, empty_selectors, respect_indents,
-                                        inherit_selectors, indent, css_indent, newlines)
-    lines = ignore_empty_lines(lines, target)
-    lines = ignore_line_comments(lines, target)
-    lines = ignore_block_comments(lines, target)
-    lines = define_variables(lines, target)
-    lines = tokenize_selectors_and_properties(lines, indent)
+    ('imports', _import_pass_file, False),
+    ('parent', _first_line_update_by_parent, False),
+    ('lex', _lex, False),
     # f, n, name, level, behind, sel, _sel
-    lines = check_indentation_errors(lines)
-    lines = check_imports_syntax(lines)
-    lines = import_files(lines, importer)
-    lines = check_media_queries_syntax(lines)
-    #lines = filter_properties(lines)
-    lines = evaluate_properties(lines)
+    ('indentation-check', _check_indentation_errors, False),
+    ('imports-check', _check_imports_syntax, False),
+    ('import-files', _import_files, False),
+    ('media-check', _check_media_queries_syntax, False),
+    ('properties', _evaluate_properties, False),
+    ('filter-properties', _filter_properties, True),
     ######################
     # Structural changes #
     ######################
-    lines = combine_selectors(lines)
+    ('combine-selectors', _combine_selectors, False),
     # name, sel, _sel
-    lines = make_statements_list(lines)
+    ('statements', _make_statements_list, False),
     # selectors, declarations
-    lines = split_selectors(lines)
-    lines = inherit_statements(lines, respect_indents, inherit_selectors)
-    lines = handle_medias(lines)
+    ('split-selectors', _split_selectors, False),
+    ('inheritance', _inherit_statements, True),
+    ('medias', _handle_medias, False),
     # media, selectors, declaration
-    lines = add_vendor_prefixes_to_properties(lines)
-    lines = add_clearfix(lines)
-    lines = make_css_from_statements(lines, compressed, empty_selectors, css_indent, target)
+    ('vendor-prefixes', _add_vendor_prefixes_to_properties, True),
+    ('clearfix', _add_clearfix, False),
+    ('clearfix-ie6-7', _add_clearfix_ie6_7, True),
+    ('shorthands', _compact_shorthands, True),
+    ('merge-rules', _merge_rules, True),
+    ('css', _make_css_from_statements, False),
+])
+pipeline_stages.disable('shorthands', 'merge-rules')
+
+
+def make_pipeline(lines, parents, compressed=True, empty_selectors=True, respect_indents=False,
+                  inherit_selectors=False, indent='  ', css_indent='    ', dependencies=None, profiler=None,
+                  stages=None, cache=None):
+    """
+    Returns css lines generator of the whole compilation pipeline built of StageRegistry `stages`,
+    `pipeline_stages` by default.
+    @parent files are appended to `parents`, imported .pass and .css files to `dependencies`.
+    Every stage is wrapped by optional StageProfiler `profiler`.
+    Minified imported .css files are kept in optional CompileCache `cache`.
+    """
+    compilation = Compilation(parents, dependencies, compressed, empty_selectors, respect_indents,
+                              inherit_selectors, indent, css_indent, cache)
+    if profiler is not None:
+        lines = profiler.wrap(lines, 'read')
+    for name, function in (stages if stages is not None else pipeline_stages):
+        lines = function(lines, compilation)
+        if profiler is not None:
+            lines = profiler.wrap(lines, name)
+    return lines
+
+
+def generate_css(lines, compressed=True, empty_selectors=True, respect_indents=False,
+                 inherit_selectors=False, indent='  ', css_indent='    ', profiler=None, stages=None):
+    """
+    Yields css lines compiled from `(file, lineno, line)` triplets.
+    A file with the @parent directive yields css of its parent file.
+    """
+    parents = []
+    for line in make_pipeline(lines, parents, compressed, empty_selectors, respect_indents,
+                              inherit_selectors, indent, css_indent, profiler=profiler, stages=stages):
+        yield line
+    for parent in parents:
+        for line in generate_css(read_from_file(parent), compressed, empty_selectors, respect_indents,
+                                 inherit_selectors, indent, css_indent, profiler, stages):
+            yield line
+
+
+def compile_string(source, filename=None, compressed=True, empty_selectors=True, respect_indents=False,
+                   inherit_selectors=False, indent='  ', css_indent='    ', newlines=True, stages=None):
+    """
+    Returns css text compiled from .pass source string.
+    Imports and @parent paths are resolved relative to `filename` directory.
+    """
+    lines = generate_css(read_from_string(source, filename), compressed, empty_selectors, respect_indents,
+                         inherit_selectors, indent, css_indent, stages=stages)
+    return ''.join(iter_chunks(lines, newlines, compressed))
+
+
+def compile_file(filename, compressed=True, empty_selectors=True, respect_indents=False,
+                 inherit_selectors=False, indent='  ', css_indent='    ', newlines=True, stages=None):
+    """Returns css text compiled from .pass file."""
+    lines = generate_css(read_from_file(filename), compressed, empty_selectors, respect_indents,
+                         inherit_selectors, indent, css_indent, stages=stages)
+    return ''.join(iter_chunks(lines, newlines, compressed))
+
+
+def process_pass(filename, compressed=True, empty_selectors=True, respect_indents=False,
+                 inherit_selectors=False, indent='  ', css_indent='    ', newlines=True, cache=None,
+                 profiler=None, stages=None):
+    """
+    Compiles .pass file into .css file near it.
+    `cache` is optional CompileCache, cached css is written without parsing at all.
+    `profiler` is optional StageProfiler collecting statistics of pipeline stages.
+    `stages` is optional StageRegistry, `pipeline_stages` by default.
+    """
+    options = (compressed, empty_selectors, respect_indents, inherit_selectors, indent, css_indent, newlines,
+               tuple((stages if stages is not None else pipeline_stages).names()))
+    if cache is not None:
+        css = cache.get(filename, options)
+        if css is not None:
+            write_to_file([css], filename, newlines=False, compressed=True)
+            return
+    parents, dependencies = [], []
+    lines = make_pipeline(read_from_file(filename), parents, compressed, empty_selectors, respect_indents,
+                          inherit_selectors, indent, css_indent, dependencies, profiler, stages, cache)
+    if cache is not None:
+        lines = list(lines)
     write_to_file(lines, filename, newlines, compressed)
+    for parent in parents:
+        os.remove(os.path.splitext(filename)[0] + '.css')
+        process_pass(parent, compressed, empty_selectors, respect_indents,
+                     inherit_selectors, indent, css_indent, newlines, cache, profiler, stages)
+    if cache is not None and not parents:
+        cache.set(filename, options, dependencies, ''.join(iter_chunks(lines, newlines, compressed)))
@@ -0,0 +1,97 @@
+# encoding: utf-8
+from __future__ import unicode_literals
+
+import os
+import sys
+import glob
+from itertools import imap
+from multiprocessing import Pool
+
+from Pass import read_from_file, process_pass, format_error
+
+
+def imported_files(filenames):
+    """Returns normalized paths of .pass files imported by `filenames`."""
+    imported = set()
+    for filename in filenames:
+        for f, n, line in read_from_file(filename):
+            if line[:7] != '@import':
+                continue
+            for name in line[7:].split():
+                name = name.strip('"\'')
+                if name.endswith('.pass'):
+                    imported.add(os.path.normpath(os.path.join(os.path.dirname(filename), name)))
+    return imported
+
+
+def find_files(paths, ext='.pass'):
+    """
+    Expands files, directories and glob patterns into the ordered list of unique filenames.
+    Partials, files of directories imported by other files of them, are left out.
+    """
+    filenames, listed, in_dirs = [], set(), set()
+    for path in paths:
+        if glob.has_magic(path):
+            found = sorted(glob.glob(path))
+        else:
+            found = [path]
+        for path in found:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    for f in sorted(files):
+                        if f.endswith(ext):
+                            filenames.append(os.path.join(root, f))
+                            in_dirs.add(filenames[-1])
+            else:
+                filenames.append(path)
+                listed.add(path)
+    partials = imported_files(in_dirs)
+    # partials are taken for already seen files
+    unique = set(f for f in in_dirs.difference(listed) if os.path.normpath(f) in partials)
+    return [f for f in filenames if not (f in unique or unique.add(f))]
+
+
+def compile_one(args):
+    filename, options = args
+    try:
+        process_pass(filename, **options)
+    except Exception as e:
+        return filename, format_error(e)
+    return filename, None
+
+
+def compile_files(filenames, jobs=1, **options):
+    """
+    Compiles .pass files with `jobs` processes.
+    Yields `(filename, error)` pairs in the order of filenames, error is None on success.
+    """
+    tasks = [(filename, options) for filename in filenames]
+    if jobs == 1 or len(tasks) < 2:
+        for result in imap(compile_one, tasks):
+            yield result
+        return
+    pool = Pool(jobs)
+    try:
+        for result in pool.imap(compile_one, tasks):
+            yield result
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def report(results, output=sys.stdout, errors=sys.stderr):
+    """Writes status line of every compiled file. Returns the number of failed files."""
+    failed = 0
+    for filename, error in results:
+        if error:
+            failed += 1
+            output.write('failed %s\n' % filename)
+            errors.write(error)
+        else:
+            output.write('ok     %s\n' % filename)
+        output.flush()
+    return failed
@@ -0,0 +1,113 @@
+# encoding: utf-8
+from __future__ import unicode_literals
+
+import os
+import codecs
+import hashlib
+import tempfile
+
+from Pass import __version__
+
+
+class CompileCache(object):
+    """
+    Content addressed on-disk cache of compiled css.
+    Manifest of entry file and options lists the files it was compiled from,
+    css is stored under hash of options and contents of all those files.
+    Least recently used files are evicted when cache grows over `max_size` bytes.
+    """
+
+    def __init__(self, path, max_size=64 * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+
+    def manifest_path(self, filename, options):
+        key = hashlib.sha1(repr((__version__, os.path.abspath(filename), options)).encode('utf-8'))
+        return os.path.join(self.path, key.hexdigest() + '.manifest')
+
+    def css_path(self, filename, dependencies, options):
+        key = hashlib.sha1(repr((__version__, options)).encode('utf-8'))
+        for path in [filename] + list(dependencies):
+            with open(path, 'rb') as f:
+                key.update(os.path.abspath(path).encode('utf-8') + b'\0' + f.read() + b'\0')
+        return os.path.join(self.path, key.hexdigest() + '.css')
+
+    def get(self, filename, options):
+        """Returns cached css text or None."""
+        manifest = self.manifest_path(filename, options)
+        try:
+            with codecs.open(manifest, 'rb', 'utf-8') as f:
+                dependencies = f.read().splitlines()
+            path = self.css_path(filename, dependencies, options)
+            with codecs.open(path, 'rb', 'utf-8') as f:
+                css = f.read()
+            os.utime(path, None)
+            os.utime(manifest, None)
+        except (IOError, OSError):
+            return None
+        return css
+
+    def set(self, filename, options, dependencies, css):
+        dependencies = [os.path.abspath(path) for path in dependencies]
+        try:
+            path = self.css_path(filename, dependencies, options)
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+            self.write(path, css)
+            self.write(self.manifest_path(filename, options), '\n'.join(dependencies))
+        except (IOError, OSError):
+            return
+        self.evict()
+
+    def minified_path(self, digest):
+        key = hashlib.sha1(repr((__version__, digest)).encode('utf-8'))
+        return os.path.join(self.path, key.hexdigest() + '.min.css')
+
+    def get_minified(self, digest):
+        """Returns cached minified css of imported .css file with `digest` content hash or None."""
+        path = self.minified_path(digest)
+        try:
+            with open(path, 'rb') as f:
+                css = f.read()
+            os.utime(path, None)
+        except (IOError, OSError):
+            return None
+        return css
+
+    def set_minified(self, digest, css):
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+            fd, temp = tempfile.mkstemp(dir=self.path)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(css)
+            os.rename(temp, self.minified_path(digest))
+        except (IOError, OSError):
+            return
+        self.evict()
+
+    def write(self, path, text):
+        fd, temp = tempfile.mkstemp(dir=self.path)
+        with codecs.getwriter('utf-8')(os.fdopen(fd, 'wb')) as f:
+            f.write(text)
+        os.rename(temp, path)
+
+    def evict(self):
+        files, size = [], 0
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+            size += st.st_size
+        files.sort()
+        for mtime, file_size, path in files:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            size -= file_size
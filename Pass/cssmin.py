@@ -105,14 +105,11 @@ def remove_empty_rules(css):
 def normalize_rgb_colors_to_hex(css):
     """Convert `from_rgb(51,102,153)` to `#336699`."""
 
-    regex = re.compile(r"from_rgb\s*\(\s*([0-9,\s]+)\s*\)")
-    match = regex.search(css)
-    while match:
+    def to_hex(match):
         colors = map(lambda s: s.strip(), match.group(1).split(","))
-        hexcolor = '#%.2x%.2x%.2x' % tuple(map(int, colors))
-        css = css.replace(match.group(), hexcolor)
-        match = regex.search(css)
-    return css
+        return '#%.2x%.2x%.2x' % tuple(map(int, colors))
+
+    return re.sub(r"from_rgb\s*\(\s*([0-9,\s]+)\s*\)", to_hex, css)
 
 
 def condense_zero_units(css):
@@ -143,17 +140,15 @@ def condense_floating_points(css):
 def condense_hex_colors(css):
     """Shorten colors from #AABBCC to #ABC where possible."""
 
-    regex = re.compile(r"([^\"'=\s])(\s*)#([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])")
-    match = regex.search(css)
-    while match:
+    def shorten(match):
         first = match.group(3) + match.group(5) + match.group(7)
         second = match.group(4) + match.group(6) + match.group(8)
         if first.lower() == second.lower():
-            css = css.replace(match.group(), match.group(1) + match.group(2) + '#' + first)
-            match = regex.search(css, match.end() - 3)
-        else:
-            match = regex.search(css, match.end())
-    return css
+            return match.group(1) + match.group(2) + '#' + first
+        return match.group()
+
+    return re.sub(r"([^\"'=\s])(\s*)#([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])",
+                  shorten, css)
 
 
 def condense_whitespace(css):
@@ -205,9 +200,12 @@ def cssmin(css, wrap=None):
 
 
 def main():
+    import codecs
     import optparse
     import sys
 
+    from minify import minify_chunks
+
     p = optparse.OptionParser(
         prog="cssmin", version=__version__,
         usage="%prog [--wrap N]",
@@ -218,7 +216,10 @@ def main():
         help="Wrap output to approximately N chars per line.")
 
     options, args = p.parse_args()
-    sys.stdout.write(cssmin(sys.stdin.read(), wrap=options.wrap))
+    stdin = codecs.getreader('utf-8')(getattr(sys.stdin, 'buffer', sys.stdin))
+    stdout = getattr(sys.stdout, 'buffer', sys.stdout)
+    for chunk in minify_chunks(iter(lambda: stdin.read(1 << 16), ''), wrap=options.wrap):
+        stdout.write(chunk.encode('utf-8'))
 
 
 if __name__ == '__main__':
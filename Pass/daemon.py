@@ -0,0 +1,129 @@
+# encoding: utf-8
+from __future__ import unicode_literals
+
+import os
+import json
+import socket
+import tempfile
+import threading
+from SocketServer import ThreadingMixIn, UnixStreamServer, StreamRequestHandler
+
+from batch import find_files, compile_files
+from cache import CompileCache
+
+
+def default_socket_path():
+    return os.environ.get('PASS_SOCKET') or os.path.join(tempfile.gettempdir(), 'pass-%s.sock' % os.getuid())
+
+
+def connect(path):
+    """Returns socket connected to `path` or None, sockets of other users are not trusted."""
+    try:
+        if os.stat(path).st_uid != os.getuid():
+            return None
+    except OSError:
+        return None
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(path)
+    except socket.error:
+        s.close()
+        return None
+    return s
+
+
+class RequestHandler(StreamRequestHandler):
+    """Compiles files of one json line request and answers with one json line of results."""
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line.strip():
+            return
+        try:
+            request = json.loads(line.decode('utf-8'))
+            options = dict((str(key), value) for key, value in request['options'].iteritems())
+            cache = self.server.get_cache(request.get('cache'))
+            results = list(compile_files(find_files(request['filenames']), cache=cache, **options))
+            response = {'results': results}
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            response = {'error': '%s: %s' % (e.__class__.__name__, e)}
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class Daemon(ThreadingMixIn, UnixStreamServer):
+    """
+    Compile server listening on UNIX socket at `path`.
+    Keeps imported modules, compiled regexes, parsed expressions and compile caches warm between requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path=None):
+        self.path = path or default_socket_path()
+        self.caches = {}
+        self.lock = threading.Lock()
+        if os.path.exists(self.path):
+            if os.stat(self.path).st_uid != os.getuid():
+                raise IOError('%s belongs to another user' % self.path)
+            s = connect(self.path)
+            if s is not None:
+                s.close()
+                raise IOError('pass daemon is already listening on %s' % self.path)
+            os.remove(self.path)
+        umask = os.umask(0o177)
+        try:
+            UnixStreamServer.__init__(self, self.path, RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def get_cache(self, options):
+        if not options:
+            return None
+        path, max_size = options
+        with self.lock:
+            key = os.path.abspath(path), max_size
+            if key not in self.caches:
+                self.caches[key] = CompileCache(*key)
+            return self.caches[key]
+
+    def server_close(self):
+        UnixStreamServer.server_close(self)
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def serve(path=None):
+    """Runs compile daemon until interrupted."""
+    server = Daemon(path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def request(filenames, path=None, cache=None, **options):
+    """
+    Compiles .pass files with the daemon listening on `path`, `cache` is optional `(directory, max_size)` pair.
+    Returns `(filename, error)` pairs like `compile_files` or None if the daemon is not running.
+    """
+    s = connect(path or default_socket_path())
+    if s is None:
+        return None
+    if cache:
+        cache = os.path.abspath(cache[0]), cache[1]
+    message = {'filenames': [os.path.abspath(f) for f in filenames], 'options': options, 'cache': cache}
+    try:
+        s.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        line = s.makefile('rb').readline()
+    except socket.error:
+        return None
+    finally:
+        s.close()
+    if not line:
+        return None
+    response = json.loads(line.decode('utf-8'))
+    if 'error' in response:
+        raise ValueError(response['error'])
+    return [tuple(result) for result in response['results']]
@@ -0,0 +1,325 @@
+# encoding: utf-8
+from __future__ import unicode_literals
+
+import re
+import threading
+import operator
+from collections import OrderedDict
+
+from units import Em, Ex, Pr, Mm, Cm, In, Pt, Pc, Px
+from colors import Color
+
+units = {'em': Em, 'ex': Ex, '%': Pr, 'mm': Mm, 'cm': Cm, 'in': In, 'pt': Pt, 'pc': Pc, 'px': Px}
+
+token_pattern = re.compile(r'''
+    \s*(?:
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:(?P<unit>em|ex|%|mm|cm|in|pt|pc|px)|[eE][-+]?\d+)?)|
+    (?P<color>\#[0-9a-fA-F]+)|
+    (?P<name>[_a-zA-Z]\w*)|
+    (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|
+    (?P<operator>\*\*|//|[-+*/%(),=\[\]])
+    )''', re.VERBOSE)
+
+MAX_EXPONENT = 1024
+MAX_POWER_BITS = 1 << 16
+MAX_REPEAT = 1 << 16
+
+
+def power(left, right):
+    """`left ** right` refusing exponents and integer powers too large to compute."""
+    if isinstance(right, (int, long, float)) and abs(right) > MAX_EXPONENT or \
+            isinstance(left, (int, long)) and isinstance(right, (int, long)) and \
+            left.bit_length() * right > MAX_POWER_BITS:
+        raise ValueError('exponent too large')
+    try:
+        return operator.pow(left, right)
+    except OverflowError:
+        raise ValueError('exponent too large')
+
+
+def multiply(left, right):
+    """`left * right` refusing to repeat lists and strings into more than MAX_REPEAT items."""
+    if isinstance(right, (int, long)) and isinstance(left, (list, basestring)):
+        left, right = right, left
+    if isinstance(left, (int, long)) and isinstance(right, (list, basestring)) and left * len(right) > MAX_REPEAT:
+        raise ValueError('repeat count too large')
+    return operator.mul(left, right)
+
+
+binary_operators = {
+    '+': operator.add, '-': operator.sub, '*': multiply, '/': operator.div,
+    '//': operator.floordiv, '%': operator.mod, '**': power,
+}
+unary_operators = {'-': operator.neg, '+': operator.pos}
+
+
+class Constant(object):
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def evaluate(self, scope):
+        return self.value
+
+
+class Construct(object):
+    """Unit or color literal, evaluated to the new instance since they are mutable."""
+
+    __slots__ = ('cls', 'value')
+
+    def __init__(self, cls, value):
+        self.cls = cls
+        self.value = value
+
+    def evaluate(self, scope):
+        return self.cls(self.value)
+
+
+class Name(object):
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def evaluate(self, scope):
+        try:
+            return scope[self.name]
+        except KeyError:
+            raise NameError('name \'%s\' is not defined' % self.name)
+
+
+class List(object):
+
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        self.items = items
+
+    def evaluate(self, scope):
+        return [item.evaluate(scope) for item in self.items]
+
+
+class UnaryOperation(object):
+
+    __slots__ = ('operator', 'operand')
+
+    def __init__(self, operator, operand):
+        self.operator = operator
+        self.operand = operand
+
+    def evaluate(self, scope):
+        return self.operator(self.operand.evaluate(scope))
+
+
+class BinaryOperation(object):
+
+    __slots__ = ('operator', 'left', 'right')
+
+    def __init__(self, operator, left, right):
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+    def evaluate(self, scope):
+        return self.operator(self.left.evaluate(scope), self.right.evaluate(scope))
+
+
+class Call(object):
+
+    __slots__ = ('function', 'args', 'kwargs')
+
+    def __init__(self, function, args, kwargs):
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+
+    def evaluate(self, scope):
+        args = [arg.evaluate(scope) for arg in self.args]
+        if self.kwargs:
+            kwargs = dict((key, value.evaluate(scope)) for key, value in self.kwargs)
+            return self.function.evaluate(scope)(*args, **kwargs)
+        return self.function.evaluate(scope)(*args)
+
+
+def tokenize(expression):
+    tokens = []
+    position, end = 0, len(expression.rstrip())
+    while position < end:
+        match = token_pattern.match(expression, position)
+        if match is None:
+            raise SyntaxError('invalid syntax')
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind), match.group('unit')))
+        position = match.end()
+    tokens.append((None, None, None))
+    return tokens
+
+
+class Parser(object):
+    """
+    Recursive descent parser of .pass expressions:
+    arithmetic on numbers, units, colors and strings, variables and function calls.
+    """
+
+    def __init__(self, expression):
+        self.tokens = tokenize(expression)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position]
+
+    def next(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def expect(self, value):
+        kind, token, _ = self.next()
+        if kind != 'operator' or token != value:
+            raise SyntaxError('invalid syntax')
+
+    def accept(self, *values):
+        kind, token, _ = self.peek()
+        if kind == 'operator' and token in values:
+            self.position += 1
+            return token
+
+    def parse(self):
+        node = self.sum()
+        if self.peek()[0] is not None:
+            raise SyntaxError('invalid syntax')
+        return node
+
+    def sum(self):
+        node = self.product()
+        while True:
+            token = self.accept('+', '-')
+            if token is None:
+                return node
+            node = BinaryOperation(binary_operators[token], node, self.product())
+
+    def product(self):
+        node = self.unary()
+        while True:
+            token = self.accept('*', '/', '//', '%')
+            if token is None:
+                return node
+            node = BinaryOperation(binary_operators[token], node, self.unary())
+
+    def unary(self):
+        token = self.accept('-', '+')
+        if token is not None:
+            return UnaryOperation(unary_operators[token], self.unary())
+        return self.power()
+
+    def power(self):
+        node = self.call()
+        if self.accept('**'):
+            node = BinaryOperation(power, node, self.unary())
+        return node
+
+    def call(self):
+        node = self.atom()
+        while self.accept('('):
+            args, kwargs = [], []
+            while not self.accept(')'):
+                kind, token, _ = self.peek()
+                if kind == 'name' and self.tokens[self.position + 1][1] == '=':
+                    self.position += 2
+                    kwargs.append((token, self.sum()))
+                elif kwargs:
+                    raise SyntaxError('non-keyword arg after keyword arg')
+                else:
+                    args.append(self.sum())
+                if not self.accept(','):
+                    self.expect(')')
+                    break
+            node = Call(node, args, kwargs)
+        return node
+
+    def atom(self):
+        kind, token, unit = self.next()
+        if kind == 'number':
+            if unit:
+                token = token[:-len(unit)]
+            value = float(token) if '.' in token or 'e' in token or 'E' in token else int(token)
+            return Construct(units[unit], value) if unit else Constant(value)
+        elif kind == 'name':
+            return Name(token)
+        elif kind == 'color':
+            if len(token) not in (4, 7):
+                raise SyntaxError('invalid color %s' % token)
+            return Construct(Color, token[1:])
+        elif kind == 'string':
+            return Constant(re.sub(r'\\(.)', r'\1', token[1:-1]))
+        elif token == '(':
+            node = self.sum()
+            self.expect(')')
+            return node
+        elif token == '[':
+            items = []
+            while not self.accept(']'):
+                items.append(self.sum())
+                if not self.accept(','):
+                    self.expect(']')
+                    break
+            return List(items)
+        raise SyntaxError('invalid syntax')
+
+
+def parse(expression):
+    """Parses .pass expression into the tree of nodes with `evaluate(scope)` method."""
+    return Parser(expression).parse()
+
+
+class ExpressionCache(object):
+    """
+    Thread safe bounded LRU cache of parsed expressions with hit and miss counters.
+    Syntax errors are cached too, since multi-value properties are parsed by trial.
+    """
+
+    def __init__(self, function=parse, maxsize=4096):
+        self.function = function
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __call__(self, expression):
+        with self.lock:
+            try:
+                value = self.items.pop(expression)
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.items[expression] = value
+                if isinstance(value, SyntaxError):
+                    raise value
+                return value
+        try:
+            value = self.function(expression)
+        except SyntaxError as e:
+            value = e
+        with self.lock:
+            self.items[expression] = value
+            if len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+        if isinstance(value, SyntaxError):
+            raise value
+        return value
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.items), 'maxsize': self.maxsize}
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.hits = self.misses = 0
+
+
+expressions = ExpressionCache()
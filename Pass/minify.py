@@ -0,0 +1,301 @@
+# encoding: utf-8
+"""
+Single pass css minifier producing the same output as the regex cascade of `cssmin`.
+
+Comments are dropped by a single substitution, the rest is tokenized once and whitespace, semicolons,
+zero units, multidimensional zeros and floating points are condensed during one walk over the tokens
+and hex colors are shortened on the way.
+Rare constructs the cascade treats specially (`@charset`, `from_rgb()`, the IE Mac comment hack)
+and line wrapping are left to `cssmin` itself.
+
+`minify_chunks` minifies a stream of text chunks segment by segment. Segments end with `}` where
+the cascade carries no state over, so each of them comes out the same as within the whole stylesheet.
+"""
+from __future__ import unicode_literals
+
+import re
+
+from cssmin import cssmin
+
+comments_pattern = re.compile(r'/\*(?:[\s\S]*?\*/|[\s\S]*)')
+tokens_pattern = re.compile(r'''
+    "\\"\}\\""                                      # box model hack, kept as is
+  | \s+
+  | [!{};:>+()\[\],]
+  | (?:[^\s!{};:>+()\[\],"]+|"(?!\\"\}\\""))+
+''', re.VERBOSE)
+hex_pattern = re.compile(r'#([0-9a-fA-F]{6})')
+float_pattern = re.compile(r'0+\.(?=\d)')
+fallback_pattern = re.compile(r'@charset|from_rgb|\\\*/')
+boundary_pattern = re.compile(r'/\*|[{}:]')
+
+WHITESPACE = frozenset(' \t\n\r\f\v')
+# spaces are dropped before and after these characters
+BEFORE = frozenset('!{};:>+()],')
+AFTER = frozenset('!{}:;>+([,')
+SPECIAL = BEFORE | AFTER
+WORD = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
+ZERO_UNITS = frozenset(['Px', 'Em', 'in', 'Cm', 'Mm', 'Pc', 'Pt', 'Ex'])
+ZEROS = frozenset(['0 0 0 0', '0 0 0', '0 0'])
+BOX_MODEL_HACK = '"\\"}\\""'
+SEGMENT_SIZE = 1 << 16
+
+
+def preserved(match):
+    """Keeps `/*!` comments, the rest of them are removed."""
+    comment = match.group()
+    return comment if comment[2:3] == '!' and len(comment) > 4 and comment[-2:] == '*/' else ''
+
+
+def pseudo_class_region(tokens, i):
+    """
+    Returns whether colons of selector starting at token `i` after `}` keep a space before them,
+    as in `p :link`, and index of token up to which that holds.
+    """
+    n = len(tokens)
+    if i >= n or tokens[i][0] in ':{':
+        return False, i
+    colon = False
+    while i < n:
+        c = tokens[i][0]
+        if c == '{':
+            return colon, i
+        if c == ':':
+            colon = True
+        i += 1
+    return False, n
+
+
+def condense_hex(word, before, tail):
+    """
+    Returns `word` with `#AABBCC` colors shortened to `#ABC` and whether it ends with a color.
+    `before` is the character before the word and `tail` tells whether it ends a color,
+    the cascade skips a color right after another one as their matches overlap.
+    """
+    pieces = []
+    start, end = 0, 0 if tail else -1
+    for match in hex_pattern.finditer(word):
+        k = match.start()
+        if k == end or (word[k - 1] if k else before) in '"\'=':
+            continue
+        end = match.end()
+        color = match.group(1)
+        first = color[::2]
+        if first.lower() == color[1::2].lower():
+            pieces.append(word[start:k])
+            pieces.append('#' + first)
+            start = end
+    tail = end == len(word)
+    if pieces:
+        pieces.append(word[start:])
+        word = ''.join(pieces)
+    return word, tail
+
+
+def end_declaration(out, colon):
+    """Appends semicolon condensing `:0 0 0 0` values of declaration starting at `colon` to `:0`."""
+    if colon is not None and len(out) - colon <= 8:
+        value = ''.join(out[colon + 1:])
+        if value in ZEROS:
+            del out[colon + 2:]
+            out[colon + 1] = value = '0'
+        if value == '0' and ''.join(out[max(colon - 3, 0):colon]).endswith('background-position'):
+            out[colon + 1] = '0 0'
+    out.append(';')
+
+
+def minify(css, wrap=None):
+    """Returns `css` minified exactly like `cssmin(css, wrap)` does."""
+    if wrap is not None or fallback_pattern.search(css):
+        return cssmin(css, wrap)
+    tokens = tokens_pattern.findall(comments_pattern.sub(preserved, css) if '/*' in css else css)
+    out = []
+    append = out.append
+    last = ''            # last character of output
+    placeholder = False  # output ends with the hack or a protected colon, hidden behind word characters
+    space = False        # whitespace met since the last token
+    semicolons = False   # semicolons met since the last token
+    colon = None         # index of the last colon of the current declaration in `out`
+    conjunction = False  # output ends with `and` word
+    color = False        # output ends with a hex color matched by the cascade
+    protect, until = pseudo_class_region(tokens, 0)
+    for i, token in enumerate(tokens):
+        c = token[0]
+        if c in WHITESPACE:
+            space = True
+            continue
+        if c == ';':
+            semicolons = True
+            space = False
+            continue
+        if semicolons:
+            semicolons = False
+            if c != '}':
+                end_declaration(out, colon)
+                last, placeholder = ';', False
+                conjunction = color = False
+            colon = None
+        gap, spaced, space = '', space, False
+        if spaced and last not in AFTER and (c not in BEFORE or c == ':' and protect):
+            append(' ')
+            gap = ' '
+        if c in SPECIAL:
+            if c == '(' and conjunction:
+                append(' (')
+            else:
+                append(c)
+            if c == ':':
+                colon = len(out) - 1
+                last, placeholder = c, protect
+                conjunction = color = False
+                continue
+            if c == '{':
+                protect = False
+                colon = None
+            elif c == '}':
+                colon = None
+                if i >= until:
+                    protect, until = pseudo_class_region(tokens, i + 1)
+            last, placeholder = c, False
+            conjunction = color = False
+        elif token == BOX_MODEL_HACK:
+            append(token)
+            last, placeholder = '_', True
+            conjunction = color = False
+        else:
+            # the cascade puts space into `and(` before condensing zeros
+            if token[-3:] == 'and':
+                conjunction = token[-4] not in WORD if len(token) > 3 else \
+                    spaced or not placeholder and last not in WORD
+            else:
+                conjunction = False
+            before = gap or last
+            if c == '0' and (before == ':' or before == ' '):
+                if token[1:2] == '%':
+                    token = '0' + token[2:]
+                elif token[1:3] in ZERO_UNITS:
+                    token = '0' + token[3:]
+                match = float_pattern.match(token)
+                if match:
+                    token = token[match.end() - 1:]
+            if '#' in token:
+                token, color = condense_hex(token, last, color)
+            else:
+                color = False
+            append(token)
+            last, placeholder = token[-1], False
+    if semicolons:
+        end_declaration(out, colon)
+    return ''.join(out).strip()
+
+
+def segments(chunks, size=SEGMENT_SIZE):
+    """
+    Yields stylesheet given in text `chunks` in segments of at least `size` characters ending with `}`,
+    but the last one. Comments are tracked the way `cssmin` finds them, ignoring strings, so no segment
+    ends within a comment, between the IE Mac hack comments, within the box model hack or where colons
+    after `}` wait for `{` to tell whether they are of pseudo classes.
+    """
+    buffer, pending, length = '', [], 0
+    scanned = 0      # position in buffer up to which it is scanned
+    comment = None   # position of comment being scanned in buffer
+    iemac = False    # the next comment is kept by the IE Mac hack
+    selector = True  # `}` met since the last `{`, the cascade may take what follows for a selector
+    colon = False    # colon met in such a selector
+    for chunk in chunks:
+        pending.append(chunk)
+        length += len(chunk)
+        if length < size:
+            continue
+        buffer += ''.join(pending)
+        pending, length = [], 0
+        while True:
+            if comment is not None:
+                end = buffer.find('*/', max(scanned, comment + 2))
+                if end < 0:
+                    scanned = max(len(buffer) - 1, comment + 2)
+                    break
+                if iemac or buffer[end - 1] == '\\' or buffer[comment + 2] == '!':
+                    # kept comments are seen by the rest of the cascade
+                    for c in re.findall(r'[{}:]', buffer[comment + 2:end]):
+                        if c == '{':
+                            selector = colon = False
+                        elif c == '}':
+                            selector = True
+                        elif selector:
+                            colon = True
+                iemac = buffer[end - 1] == '\\'
+                comment, scanned = None, end + 2
+                continue
+            match = boundary_pattern.search(buffer, scanned)
+            if not match:
+                scanned = max(scanned, len(buffer) - 1)
+                break
+            c, end = match.group(), match.end()
+            scanned = end
+            if c == '/*':
+                comment = match.start()
+            elif c == '{':
+                selector = colon = False
+            elif c == ':':
+                colon = colon or selector
+            else:
+                selector = True
+                if end == len(buffer):
+                    scanned = match.start()
+                    break
+                # `}` of the box model hack is preceded by a quote, or by end of comment within it,
+                # and selector after `}` is taken from an earlier one when it starts with colon
+                if end >= size and not iemac and not colon and buffer[end - 2:end - 1] not in ('"', '/') \
+                        and buffer[end] not in (':', '/'):
+                    yield buffer[:end]
+                    buffer, scanned = buffer[end:], 0
+    buffer += ''.join(pending)
+    if buffer:
+        yield buffer
+
+
+def wrap_lines(css, wrap, column=0):
+    """
+    Returns lines of `css` broken after `}` once they have `wrap` characters like `cssmin` does,
+    the first line continuing a line of `column` characters.
+    """
+    lines, start = [], 0
+    i = css.find('}')
+    while i >= 0:
+        if column + i - start >= wrap and css[max(i - 3, 0):i + 4] != BOX_MODEL_HACK:
+            lines.append(css[start:i + 1])
+            start, column = i + 1, 0
+        i = css.find('}', i + 1)
+    lines.append(css[start:])
+    return lines
+
+
+def minify_chunks(chunks, wrap=None, size=SEGMENT_SIZE):
+    """
+    Yields stylesheet given in text `chunks` minified like `cssmin` does it with the whole of them,
+    keeping about `size` characters in memory, plus the longest rule or comment.
+    A `@charset` rule is only moved to the start of its segment and lines are wrapped approximately
+    the way `cssmin` does it, not counting the box model hack and duplicate semicolons in.
+    """
+    first = True
+    column, newline = 0, False
+    for segment in segments(chunks, size):
+        if first:
+            css, first = minify(segment), False
+        else:
+            # the cascade sees `}` ending the previous segment before this one, `{` keeps it from taking
+            # `}` for a part of selector at the start
+            css = minify('{}' + segment).replace('{}', '', 1)
+        if not css:
+            continue
+        if wrap is not None:
+            lines = wrap_lines(css, wrap, column)
+            column = len(lines[-1]) + (column if len(lines) == 1 else 0)
+            css = '\n'.join(lines)
+            if newline:
+                css = '\n' + css
+            newline = not lines[-1]
+            if newline:
+                css = css[:-1]
+        yield css
@@ -0,0 +1,90 @@
+# encoding: utf-8
+from __future__ import unicode_literals
+
+import sys
+from timeit import default_timer
+from collections import OrderedDict
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def max_rss():
+    """Returns peak resident memory of the process in kilobytes or 0 where it is unknown."""
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+class Stage(object):
+
+    __slots__ = ('time', 'items_in', 'items_out', 'memory')
+
+    def __init__(self):
+        self.time = 0.
+        self.items_in = 0
+        self.items_out = 0
+        self.memory = 0
+
+
+class StageProfiler(object):
+    """
+    Collects exclusive wall time, consumed and produced items and peak memory growth
+    of every wrapped generator stage of the pipeline.
+    Time and memory spent pulling items from upstream stages, including their profiling,
+    is not counted to the stage.
+    """
+
+    def __init__(self):
+        self.stages = OrderedDict()
+        self.stack = []
+        self.inner_time = 0.
+        self.inner_memory = 0
+
+    def wrap(self, lines, name=None):
+        """Returns iterator over `lines` recording statistics under `name` or generator name."""
+        name = name or getattr(lines, '__name__', lines.__class__.__name__)
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = Stage()
+        return self.iterate(stage, iter(lines))
+
+    def iterate(self, stage, lines):
+        stack = self.stack
+        while True:
+            outer = default_timer()
+            inner_time, inner_memory = self.inner_time, self.inner_memory
+            self.inner_time, self.inner_memory = 0., 0
+            stack.append(stage)
+            memory = max_rss()
+            start = default_timer()
+            try:
+                item = next(lines)
+            except StopIteration:
+                return
+            finally:
+                elapsed = default_timer() - start
+                growth = max_rss() - memory
+                stack.pop()
+                stage.time += elapsed - self.inner_time
+                stage.memory += growth - self.inner_memory
+                self.inner_time = inner_time + default_timer() - outer
+                self.inner_memory = inner_memory + growth
+            stage.items_out += 1
+            if stack:
+                stack[-1].items_in += 1
+            yield item
+
+    def report(self, output=sys.stderr):
+        """Writes table of stages in pipeline order."""
+        total = sum(stage.time for stage in self.stages.itervalues())
+        output.write('%-40s %10s %7s %10s %10s %10s\n' % ('stage', 'time, ms', '%', 'items in', 'items out',
+                                                          'memory, kb'))
+        for name, stage in self.stages.iteritems():
+            output.write('%-40s %10.2f %7.1f %10d %10d %10d\n' % (
+                name, stage.time * 1000, stage.time / (total or 1.) * 100,
+                stage.items_in, stage.items_out, stage.memory))
+        output.write('%-40s %10.2f\n' % ('total', total * 1000))
@@ -404,4 +404,32 @@ vendor_prefixed_properties = {
     'wrap-through': 'ms webkit',
     'writing-mode': 'ms epub',
     'zoom': 'ms',
-}
\ No newline at end of file
+}
+# properties, shorthands and aliases overriding properties of other families than their own
+overridden_families = {
+    'font': ('line',),
+    'inset': ('top', 'right', 'bottom', 'left'),
+    'place': ('align', 'justify'),
+    'gap': ('row', 'column'),
+    'grid-gap': ('gap', 'row', 'column'),
+    'grid-row-gap': ('row',),
+    'grid-column-gap': ('column',),
+    'columns': ('column',),
+    'page': ('break',),
+    'word-wrap': ('overflow',),
+    'white': ('text',),
+}
+hack_prefix_pattern = re.compile(r'^[*_]?(?:-(?!-)[a-z]+-)?')
+
+
+def property_families(prop):
+    """
+    Returns names of property families `prop` belongs to, properties of different families do not
+    override each other. Family is the first part of name without vendor prefix, `margin-left` and
+    `-webkit-margin-start` belong to the family of `margin` shorthand, `all` overrides all of them.
+    """
+    if prop[:2] == '--':
+        return prop,
+    name = hack_prefix_pattern.sub('', prop)
+    family = name.partition('-')[0]
+    return (family,) + overridden_families.get(name, overridden_families.get(family, ()))
@@ -0,0 +1,153 @@
+# encoding: utf-8
+from __future__ import unicode_literals
+
+import os
+import sys
+import time
+
+from Pass import format_error
+from base import read_from_file, write_to_file, make_pipeline
+from batch import report
+
+
+class Watcher(object):
+    """
+    Keeps @import and @parent dependency graph of .pass files under `path`
+    and recompiles only entry files affected by changed files.
+    Entry files are .pass files that are neither imported nor have @parent directive.
+    """
+
+    def __init__(self, path, compressed=True, empty_selectors=True, respect_indents=False,
+                 inherit_selectors=False, indent='  ', css_indent='    ', newlines=True, stages=None):
+        self.path = os.path.abspath(path)
+        self.options = compressed, empty_selectors, respect_indents, inherit_selectors, indent, css_indent
+        self.stages = stages
+        self.newlines = newlines
+        self.compressed = compressed
+        self.dependencies = {}  # filename: files it is compiled from
+        self.parents = {}  # filename: @parent filename
+        self.stats = {}
+
+    def find_files(self):
+        for root, dirs, files in os.walk(self.path):
+            dirs.sort()
+            for f in sorted(files):
+                if f.endswith('.pass'):
+                    yield os.path.join(root, f)
+
+    def stat(self, filenames):
+        stats = {}
+        for filename in filenames:
+            try:
+                st = os.stat(filename)
+            except OSError:
+                continue
+            stats[filename] = st.st_mtime, st.st_size
+        return stats
+
+    def tracked_files(self):
+        files = set(self.find_files())
+        for dependencies in self.dependencies.itervalues():
+            files.update(dependencies)
+        return files
+
+    def entries(self):
+        imported = set(self.parents)
+        for filename, dependencies in self.dependencies.iteritems():
+            imported.update(dependencies.difference([filename]))
+        return sorted(f for f in self.dependencies if f not in imported)
+
+    def compile(self, filename):
+        """Compiles file in memory and updates its dependency edges. Returns css lines."""
+        parents, dependencies = [], []
+        try:
+            lines = list(make_pipeline(read_from_file(filename), parents, *self.options,
+                                       dependencies=dependencies, stages=self.stages))
+        finally:
+            self.dependencies[filename] = set(os.path.abspath(f) for f in dependencies)
+            self.parents.pop(filename, None)
+            for parent in parents:
+                parent = os.path.abspath(parent)
+                self.parents[filename] = parent
+                self.dependencies.setdefault(parent, set()).add(filename)
+        return lines
+
+    def forget(self, filename):
+        self.dependencies.pop(filename, None)
+        parent = self.parents.pop(filename, None)
+        if parent in self.dependencies:
+            self.dependencies[parent].discard(filename)
+
+    def affected(self, changed):
+        return [f for f in self.entries() if f in changed or self.dependencies[f] & changed]
+
+    def write(self, filename, lines):
+        write_to_file(lines, filename, self.newlines, self.compressed)
+
+    def build(self, filenames):
+        """Recompiles entry files. Returns `(filename, error)` pairs, error is None on success."""
+        results = []
+        for filename in filenames:
+            try:
+                lines = self.compile(filename)
+            except Exception as e:
+                results.append((filename, format_error(e)))
+                continue
+            if filename not in self.parents:
+                self.write(filename, lines)
+                results.append((filename, None))
+        return results
+
+    def start(self):
+        """Compiles every file under the path to discover the graph and writes entry files."""
+        compiled, results = {}, []
+        for filename in self.find_files():
+            try:
+                compiled[filename] = self.compile(filename)
+            except Exception as e:
+                compiled[filename] = e
+        self.stats = self.stat(self.tracked_files())
+        for filename in self.entries():
+            lines = compiled.get(filename)
+            if lines is None:
+                results.extend(self.build([filename]))
+            elif isinstance(lines, Exception):
+                results.append((filename, format_error(lines)))
+            else:
+                self.write(filename, lines)
+                results.append((filename, None))
+        return results
+
+    def poll(self):
+        """Rebuilds entry files affected by files changed since the last poll."""
+        stats = self.stat(self.tracked_files())
+        changed = set(f for f in set(stats) | set(self.stats) if stats.get(f) != self.stats.get(f))
+        self.stats = stats
+        if not changed:
+            return []
+        entries = set(self.entries())
+        for filename in changed:
+            if filename not in stats:
+                self.forget(filename)
+            elif filename.endswith('.pass') and (filename not in self.dependencies or filename in self.parents):
+                try:
+                    self.compile(filename)
+                except Exception:
+                    pass
+        affected = set(self.affected(changed))
+        affected.update(f for f in self.entries() if f not in entries)
+        results = self.build(sorted(affected))
+        self.stats.update(self.stat(self.tracked_files().difference(self.stats)))
+        return results
+
+
+def watch(paths, interval=1., output=sys.stdout, errors=sys.stderr, **options):
+    """Builds .pass files under paths and rebuilds them on changes until interrupted."""
+    watchers = [Watcher(path, **options) for path in paths]
+    for watcher in watchers:
+        report(watcher.start(), output, errors)
+    while True:
+        time.sleep(interval)
+        for watcher in watchers:
+            report(watcher.poll(), output, errors)
+
@@ -0,0 +1,75 @@
+# encoding: utf-8
+"""
+Shows how the color passes of cssmin scale with the number of colors in a stylesheet.
+
+    python -m benchmarks.colors --colors 1000 2000 4000 8000 16000
+"""
+from __future__ import unicode_literals
+
+import re
+import random
+import argparse
+
+from Pass.cssmin import normalize_rgb_colors_to_hex, condense_hex_colors
+from benchmarks.expressions import measure
+
+
+def search_normalize_rgb_colors_to_hex(css):
+    regex = re.compile(r"from_rgb\s*\(\s*([0-9,\s]+)\s*\)")
+    match = regex.search(css)
+    while match:
+        colors = map(lambda s: s.strip(), match.group(1).split(","))
+        hexcolor = '#%.2x%.2x%.2x' % tuple(map(int, colors))
+        css = css.replace(match.group(), hexcolor)
+        match = regex.search(css)
+    return css
+
+
+def search_condense_hex_colors(css):
+    regex = re.compile(r"([^\"'=\s])(\s*)#([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])([0-9a-fA-F])")
+    match = regex.search(css)
+    while match:
+        first = match.group(3) + match.group(5) + match.group(7)
+        second = match.group(4) + match.group(6) + match.group(8)
+        if first.lower() == second.lower():
+            css = css.replace(match.group(), match.group(1) + match.group(2) + '#' + first)
+            match = regex.search(css, match.end() - 3)
+        else:
+            match = regex.search(css, match.end())
+    return css
+
+
+def colored_stylesheet(colors, seed=0):
+    """Returns minified stylesheet with `colors` distinct `from_rgb()` and `#AABBCC` colors, one rule each."""
+    r = random.Random(seed)
+    rules = []
+    for i in range(colors):
+        if i % 2:
+            value = 'from_rgb(%s, %s, %s)' % (r.randint(0, 255), r.randint(0, 255), r.randint(0, 255))
+        else:
+            value = '#%06x' % (i * 17 if i % 4 else i // 4 * 0x110011)
+        rules.append('.c%s{color:%s}' % (i, value))
+    return ''.join(rules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--colors', type=int, nargs='+', default=[1000, 2000, 4000, 8000, 16000],
+                        help='numbers of colors')
+    parser.add_argument('--repeat', type=int, default=3, help='best of N runs')
+    args = parser.parse_args()
+
+    print '%8s %14s %14s %14s %14s' % ('colors', 'search rgb', 'sub rgb', 'search hex', 'sub hex')
+    for colors in args.colors:
+        css = colored_stylesheet(colors)
+        assert normalize_rgb_colors_to_hex(css) == search_normalize_rgb_colors_to_hex(css)
+        hexed = normalize_rgb_colors_to_hex(css)
+        assert condense_hex_colors(hexed) == search_condense_hex_colors(hexed)
+        row = [measure(lambda: function(text), args.repeat) * 1000 for function, text in (
+            (search_normalize_rgb_colors_to_hex, css), (normalize_rgb_colors_to_hex, css),
+            (search_condense_hex_colors, hexed), (condense_hex_colors, hexed))]
+        print '%8s %11.2f ms %11.2f ms %11.2f ms %11.2f ms' % tuple([colors] + row)
+
+
+if __name__ == '__main__':
+    main()
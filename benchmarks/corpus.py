@@ -0,0 +1,110 @@
+# encoding: utf-8
+"""
+Generates synthetic .pass stylesheets of given size and shape.
+
+    python -m benchmarks.corpus --selectors 5000 --depth 4 path/
+"""
+from __future__ import unicode_literals
+
+import os
+import random
+import argparse
+
+properties = [
+    ('width', lambda r, v: '%s * %s' % (r.choice(v), r.randint(1, 9))),
+    ('height', lambda r, v: '%spx' % r.randint(1, 500)),
+    ('margin', lambda r, v: '%s %s*2 0 auto' % (r.choice(v), r.choice(v))),
+    ('padding-top', lambda r, v: '%s / 2' % r.choice(v)),
+    ('color', lambda r, v: '#%06x' % r.randint(0, 0xffffff)),
+    ('background-color', lambda r, v: 'lighten(#%02x%02x%02x, %s%%)' % (
+        r.randint(0, 127), r.randint(0, 127), r.randint(0, 127), r.randint(1, 40))),
+    ('float', lambda r, v: r.choice(['left', 'right', 'none'])),
+    ('display', lambda r, v: r.choice(['block', 'inline-block', 'none'])),
+    ('border-radius', lambda r, v: '%spx' % r.randint(1, 8)),
+    ('box-shadow', lambda r, v: '0 1px %spx #000' % r.randint(1, 8)),
+]
+
+
+class Corpus(object):
+    """
+    Parameters of generated stylesheet:
+    `selectors` root selectors nested `depth` levels deep, `variables` size variables,
+    fractions of root selectors wrapped into @media, moved into @import-ed partial files
+    and of nested selectors using `_`/`-` inheritance instead of descendant selectors.
+    """
+
+    def __init__(self, selectors=1000, depth=3, variables=20, media=0.1, imports=0.1, inheritance=0.5,
+                 properties=4, seed=0):
+        self.selectors = selectors
+        self.depth = depth
+        self.variables = variables
+        self.media = media
+        self.imports = imports
+        self.inheritance = inheritance
+        self.properties = properties
+        self.seed = seed
+
+    def params(self):
+        return dict((name, getattr(self, name)) for name in (
+            'selectors', 'depth', 'variables', 'media', 'imports', 'inheritance', 'properties', 'seed'))
+
+    def make_rule(self, r, names, i, level=0, indent='  '):
+        prefix = indent * level
+        if level == 0:
+            lines = ['.block%s' % i]
+        elif r.random() < self.inheritance:
+            lines = [prefix + r.choice('_-') + 'part%s' % level]
+        else:
+            lines = [prefix + 'div.part%s' % level]
+        for prop, value in r.sample(properties, min(self.properties, len(properties))):
+            lines.append(prefix + indent + '%s %s' % (prop, value(r, names)))
+        if level + 1 < self.depth:
+            lines.extend(self.make_rule(r, names, i, level + 1, indent))
+        return lines
+
+    def write(self, path):
+        """Writes stylesheet and its partials into the `path` directory. Returns the main filename."""
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        r = random.Random(self.seed)
+        names = ['size%s' % i for i in range(max(self.variables, 1))]
+        main = ['%s = %spx' % (name, r.randint(1, 32)) for name in names]
+        partials = []
+        for i in range(self.selectors):
+            rule = self.make_rule(r, names, i)
+            if r.random() < self.imports:
+                partials.append(rule)
+                continue
+            if r.random() < self.media:
+                main.append('@media screen and (max-width: %spx)' % r.choice([480, 768, 1024]))
+                rule = ['  ' + line for line in rule]
+            main.extend(rule)
+        for i, rule in enumerate(partials):
+            filename = 'partial%s.pass' % i
+            with open(os.path.join(path, filename), 'w') as f:
+                f.write('\n'.join(rule) + '\n')
+            main.insert(len(names) + i, '@import "%s"' % filename)
+        filename = os.path.join(path, 'style.pass')
+        with open(filename, 'w') as f:
+            f.write('\n'.join(main) + '\n')
+        return filename
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', help='output directory')
+    parser.add_argument('--selectors', type=int, default=1000, help='number of root selectors')
+    parser.add_argument('--depth', type=int, default=3, help='nesting depth')
+    parser.add_argument('--variables', type=int, default=20, help='number of variables')
+    parser.add_argument('--media', type=float, default=0.1, help='fraction of selectors inside @media')
+    parser.add_argument('--imports', type=float, default=0.1, help='fraction of selectors in imported files')
+    parser.add_argument('--inheritance', type=float, default=0.5, help='fraction of _/- nested selectors')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+    corpus = Corpus(args.selectors, args.depth, args.variables, args.media, args.imports, args.inheritance,
+                    seed=args.seed)
+    print corpus.write(args.path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+# encoding: utf-8
+"""
+Compares parsed expression trees with the former exec/eval of rewritten strings.
+
+    python -m benchmarks.expressions --rules 2000
+"""
+from __future__ import unicode_literals
+
+import time
+import argparse
+
+from Pass import base
+from Pass.base import compile_string, make_scope
+from Pass.units import unit_pattern
+from Pass.colors import color_pattern
+from Pass.expressions import ExpressionCache, parse
+
+_globals = {'__builtins__': None}
+
+
+class EvalExpression(object):
+    """The former evaluation path: regex rewriting and eval of the string on every call."""
+
+    def __init__(self, expression):
+        self.expression = expression
+
+    def evaluate(self, scope):
+        return eval(color_pattern(unit_pattern(self.expression)), _globals, scope)
+
+
+variables = [('size', '16px'), ('gap', 'size / 4'), ('link', '#1f6ba2'), ('ratio', '1.5')]
+
+
+def make_expressions(i):
+    return [
+        ('width', 'size * %s + gap' % (i % 7 + 1)),
+        ('line-height', 'size * ratio'),
+        ('color', 'lighten(link, %s%%)' % (i % 10)),
+        ('margin', 'gap gap*2 0 auto'),
+        ('padding-top', 'gap / 2'),
+        ('background-color', '#fff'),
+    ]
+
+
+def make_stylesheet(rules):
+    lines = ['%s = %s' % variable for variable in variables]
+    for i in range(rules):
+        lines.append('.block%s' % i)
+        for prop, value in make_expressions(i):
+            lines.append('  %s %s' % (prop, value))
+    return '\n'.join(lines) + '\n'
+
+
+def make_values(rules):
+    scope = make_scope()
+    for variable, value in variables:
+        scope[variable] = parse(value).evaluate(scope)
+    values = []
+    for i in range(rules):
+        for prop, value in make_expressions(i):
+            values.extend(['gap', 'gap*2', '0', 'auto'] if prop == 'margin' else [value])
+    return scope, values
+
+
+def measure(function, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        function()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rules', type=int, default=2000, help='number of generated rules')
+    parser.add_argument('--repeat', type=int, default=5, help='best of N runs')
+    args = parser.parse_args()
+
+    stylesheet = make_stylesheet(args.rules)
+    scope, values = make_values(args.rules)
+    codes = ExpressionCache(lambda e: compile(color_pattern(unit_pattern(e)), '<pass>', 'eval'))
+    trees = ExpressionCache(parse)
+
+    def eval_strings():
+        for value in values:
+            eval(color_pattern(unit_pattern(value)), _globals, scope)
+
+    def eval_codes():
+        for value in values:
+            eval(codes(value), _globals, scope)
+
+    def parse_trees():
+        for value in values:
+            parse(value).evaluate(scope)
+
+    def evaluate_trees():
+        for value in values:
+            trees(value).evaluate(scope)
+
+    print '%s expressions of %s rules' % (len(values), args.rules)
+    for name, function in (('eval of rewritten string', eval_strings),
+                           ('eval of cached code', eval_codes),
+                           ('parse and evaluate tree', parse_trees),
+                           ('evaluate cached tree', evaluate_trees)):
+        print '  %-28s %8.2f ms' % (name, measure(function, args.repeat) * 1000)
+
+    print 'full compilation of %s lines' % len(stylesheet.splitlines())
+    expressions = base.expressions
+    try:
+        base.expressions = EvalExpression
+        eval_time = measure(lambda: compile_string(stylesheet), args.repeat)
+    finally:
+        base.expressions = expressions
+    tree_time = measure(lambda: compile_string(stylesheet), args.repeat)
+    print '  %-28s %8.2f ms' % ('eval of rewritten string', eval_time * 1000)
+    print '  %-28s %8.2f ms' % ('evaluate cached tree', tree_time * 1000)
+
+
+if __name__ == '__main__':
+    main()
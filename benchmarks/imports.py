@@ -0,0 +1,69 @@
+# encoding: utf-8
+"""
+Compares compilation of entry files sharing imported partials with and without the process wide partial cache.
+
+    python -m benchmarks.imports --entries 100 --partials 30
+"""
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import argparse
+
+from Pass.base import pipeline_stages, partials, import_files, compile_file
+from benchmarks.corpus import Corpus
+from benchmarks.expressions import measure
+
+
+def import_files_in_place(lines, compilation):
+    return import_files(lines, compilation.importer, compilation.dependencies)
+
+
+def write(path, entries, partials_, selectors):
+    """Writes partials generated by Corpus and entry files importing all of them. Returns entry filenames."""
+    names = []
+    for i in range(partials_):
+        filename = Corpus(selectors, imports=0, media=0, variables=5, seed=i).write(os.path.join(path, 'p%s' % i))
+        names.append(os.path.relpath(filename, path))
+    filenames = []
+    for i in range(entries):
+        filename = os.path.join(path, 'entry%s.pass' % i)
+        with open(filename, 'w') as f:
+            f.write(''.join('@import "%s"\n' % name for name in names))
+            f.write('.entry%s\n  float left\n' % i)
+        filenames.append(filename)
+    return filenames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100, help='number of entry files')
+    parser.add_argument('--partials', type=int, default=30, help='number of partials imported by every entry')
+    parser.add_argument('--selectors', type=int, default=10, help='root selectors per partial')
+    parser.add_argument('--repeat', type=int, default=3, help='best of N runs')
+    args = parser.parse_args()
+
+    path = tempfile.mkdtemp()
+    try:
+        filenames = write(path, args.entries, args.partials, args.selectors)
+        in_place = pipeline_stages.copy()
+        in_place.stages = [(name, import_files_in_place if name == 'import-files' else function, optional)
+                           for name, function, optional in in_place.stages]
+        assert [compile_file(f) for f in filenames] == [compile_file(f, stages=in_place) for f in filenames]
+
+        def compile_all(stages=pipeline_stages):
+            partials.clear()
+            for filename in filenames:
+                compile_file(filename, stages=stages)
+
+        print 'compiling %s entries importing %s partials' % (args.entries, args.partials)
+        for name, stages in (('lexed in place', in_place), ('partial cache', pipeline_stages)):
+            print '  %-28s %8.2f ms' % (name, measure(lambda: compile_all(stages), args.repeat) * 1000)
+        print '  partial cache hits %s, misses %s' % (partials.hits, partials.misses)
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# encoding: utf-8
+"""
+Measures inheritance of declarations along long block_parent-element_modifier chains.
+
+    python -m benchmarks.inheritance --blocks 200 --depth 4 10 20
+"""
+from __future__ import unicode_literals
+
+import argparse
+
+from Pass.base import inherit_statements
+from benchmarks.expressions import measure
+
+
+def chains(blocks, depth, properties=20):
+    """
+    Returns statements of `blocks` blocks, each with element and block inheritance chains
+    `depth` modifiers long, overriding a quarter of the inherited properties on every step.
+    """
+    statements = []
+    for i in range(blocks):
+        block, element = '.block%s' % i, '-element'
+        declarations = [('prop%s' % p, 0) for p in range(properties)]
+        statements.append(([[block]], declarations))
+        statements.append(([[block + element]], declarations))
+        modifiers = ''
+        for level in range(depth):
+            modifiers += '_m%s' % level
+            declarations = [('prop%s' % ((level * properties // 4 + p) % properties), level + 1)
+                            for p in range(properties // 4)]
+            statements.append(([[block + element + modifiers]], declarations))
+            statements.append(([['.child%s_%s%s' % (level, block[1:], element + modifiers)]], declarations))
+    return statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=200, help='number of blocks')
+    parser.add_argument('--depth', type=int, nargs='+', default=[4, 10, 20], help='modifier chain lengths')
+    parser.add_argument('--properties', type=int, default=20, help='declarations per block')
+    parser.add_argument('--repeat', type=int, default=5, help='best of N runs')
+    args = parser.parse_args()
+
+    for depth in args.depth:
+        statements = chains(args.blocks, depth, args.properties)
+        declarations = sum(len(d) for s, d in inherit_statements(statements))
+        print '  depth %-4s %8s statements %8s declarations %10.2f ms' % (
+            depth, len(statements), declarations,
+            measure(lambda: list(inherit_statements(statements)), args.repeat) * 1000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# encoding: utf-8
+"""
+Compares the single pass lexer with the former chain of line filter generators.
+
+    python -m benchmarks.lexer --selectors 5000
+"""
+from __future__ import unicode_literals
+
+import shutil
+import tempfile
+import argparse
+
+from Pass.base import (null, make_scope, read_from_file, ignore_empty_lines, ignore_line_comments,
+                       ignore_block_comments, define_variables, tokenize_selectors_and_properties, lex)
+from benchmarks.corpus import Corpus
+from benchmarks.expressions import measure
+
+
+def chain(lines):
+    target = null()
+    lines = ignore_empty_lines(lines, target)
+    lines = ignore_line_comments(lines, target)
+    lines = ignore_block_comments(lines, target)
+    lines = define_variables(lines, target, make_scope())
+    return tokenize_selectors_and_properties(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--selectors', type=int, default=5000, help='number of generated root selectors')
+    parser.add_argument('--repeat', type=int, default=5, help='best of N runs')
+    args = parser.parse_args()
+
+    path = tempfile.mkdtemp()
+    try:
+        filename = Corpus(args.selectors, depth=3, imports=0).write(path)
+        lines = list(read_from_file(filename))
+    finally:
+        shutil.rmtree(path)
+    # comments and blank lines, as written by hand
+    source = []
+    for i, line in enumerate(lines):
+        source.append(line)
+        if i % 10 == 0:
+            source.append((line[0], line[1], ''))
+            source.append((line[0], line[1], '  // comment'))
+        if i % 50 == 0:
+            source.append((line[0], line[1], '/* block'))
+            source.append((line[0], line[1], '   comment */'))
+    assert list(chain(source)) == list(lex(source, make_scope()))
+
+    print 'tokenizing %s lines' % len(source)
+    for name, function in (('generator chain', lambda: list(chain(source))),
+                           ('single pass lexer', lambda: list(lex(source, make_scope())))):
+        print '  %-28s %8.2f ms' % (name, measure(function, args.repeat) * 1000)
+
+
+if __name__ == '__main__':
+    main()
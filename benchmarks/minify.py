@@ -0,0 +1,94 @@
+# encoding: utf-8
+"""
+Compares the single pass minifier, whole and streamed in chunks, with the regex cascade of cssmin
+on a generated vendor stylesheet.
+
+    python -m benchmarks.minify --size 1000000
+"""
+from __future__ import unicode_literals
+
+import random
+import argparse
+
+from Pass.cssmin import cssmin
+from Pass.minify import minify, minify_chunks, segments
+from benchmarks.expressions import measure
+
+selectors = [
+    '.btn-%s', '.btn-%s:hover', '.btn-%s:focus, .btn-%s.focus', 'a.list-%s:not(.active)', '.nav > li > a.item-%s',
+    '.table-%s tr:nth-child(2n+1) td', '.form-%s input[type="text"]', '.icon-%s:before', '.dropdown-%s::after',
+    'ul.menu-%s li + li', '.card-%s ~ .card', '.panel-%s p :first-child', '#section-%s .title', '.label-%s',
+]
+values = [
+    ('margin', lambda r: r.choice(['0', '0 0', '0 0 0 0', '0px', '0 auto', '%spx 0' % r.randint(1, 40)])),
+    ('padding', lambda r: '%spx %spx' % (r.randint(0, 20), r.randint(0, 20))),
+    ('color', lambda r: r.choice(['#%06x' % r.randint(0, 0xffffff), '#ffffff', '#333333', '#FFF', 'inherit'])),
+    ('background-color', lambda r: r.choice(['#%02x%02x%02x' % ((r.randint(0, 15) * 17,) * 3), 'transparent',
+                                             'rgba(0, 0, 0, 0.5)'])),
+    ('background-position', lambda r: r.choice(['0 0', '0 -%spx' % r.randint(1, 400), 'center'])),
+    ('background-image', lambda r: r.choice([
+        'linear-gradient(to bottom, #ffffff 0%%, #%06x 100%%)' % r.randint(0, 0xffffff),
+        'url("../img/sprite-%s.png")' % r.randint(1, 9),
+        'url(data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==)'])),
+    ('border', lambda r: '%spx solid #%s' % (r.randint(0, 3), r.choice(['cccccc', 'dddddd', 'e5e5e5', 'adadad']))),
+    ('border-color', lambda r: '#%s #%s' % (r.choice(['cccccc', 'ffffff']), r.choice(['dddddd', 'e6e6e6']))),
+    ('font', lambda r: '%spx/1.42857143 "Helvetica Neue", Helvetica, Arial, sans-serif' % r.randint(10, 24)),
+    ('opacity', lambda r: '0.%s' % r.randint(1, 99)),
+    ('line-height', lambda r: '0.%s5em' % r.randint(0, 9)),
+    ('transition', lambda r: 'opacity .15s linear, transform 0.3s ease-out'),
+    ('box-shadow', lambda r: 'inset 0 1px 1px rgba(0, 0, 0, .075), 0 0 8px rgba(102, 175, 233, 0.6)'),
+    ('filter', lambda r: "progid:DXImageTransform.Microsoft.gradient(startColorstr='#80000000', "
+                         "endColorstr='#80000000', GradientType=0)"),
+    ('*zoom', lambda r: '1'),
+    ('display', lambda r: r.choice(['block', 'inline-block', 'none !important'])),
+    ('content', lambda r: r.choice(['""', '"\\f%03x"' % r.randint(0, 0xfff), '" "'])),
+]
+
+
+def vendor_stylesheet(size=1000000, seed=0):
+    """Returns unminified stylesheet of about `size` characters in the style of css frameworks."""
+    r = random.Random(seed)
+    parts = ['/*!\n * Vendor v3.3.7 (http://example.com)\n * Licensed under MIT\n */\n']
+    length = len(parts[0])
+    i = 0
+    while length < size:
+        i += 1
+        if i % 40 == 0:
+            part = '/* ==========\n   Section %s\n   ========== */\n' % i
+        elif i % 25 == 0:
+            part = '@media (min-width: %spx) and (max-width: %spx) {\n  .col-%s {\n    float: left;\n' \
+                   '    width: %s%%;\n  }\n}\n' % (r.choice([768, 992]), r.choice([991, 1199]), i, r.randint(1, 100))
+        elif i % 97 == 0:
+            part = '@keyframes spin-%s {\n  0%% {\n    transform: rotate(0deg);\n  }\n  100%% {\n' \
+                   '    transform: rotate(359deg);\n  }\n}\n' % i
+        else:
+            selector = r.choice(selectors)
+            rule = [',\n'.join(selector.replace('%s', str(i)) for j in range(r.randint(1, 2))) + ' {']
+            for prop, value in r.sample(values, r.randint(1, 6)):
+                rule.append('  %s: %s;' % (prop, value(r)))
+            part = '\n'.join(rule) + '\n}\n'
+        parts.append(part)
+        length += len(part)
+    return ''.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, nargs='+', default=[100000, 1000000], help='stylesheet sizes')
+    parser.add_argument('--repeat', type=int, default=3, help='best of N runs')
+    args = parser.parse_args()
+
+    for size in args.size:
+        css = vendor_stylesheet(size)
+        chunks = [css[i:i + 4096] for i in range(0, len(css), 4096)]
+        assert minify(css) == cssmin(css) == ''.join(minify_chunks(chunks))
+        print 'minifying %s characters, streamed in segments of at most %s' % (
+            len(css), max(len(segment) for segment in segments(chunks)))
+        for name, function in (('cssmin regex cascade', lambda: cssmin(css)),
+                               ('single pass minifier', lambda: minify(css)),
+                               ('streamed in chunks', lambda: list(minify_chunks(chunks)))):
+            print '  %-28s %8.2f ms' % (name, measure(function, args.repeat) * 1000)
+
+
+if __name__ == '__main__':
+    main()
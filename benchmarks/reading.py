@@ -0,0 +1,49 @@
+# encoding: utf-8
+"""
+Compares bulk decoded reading of source files with the former codecs line iteration.
+
+    python -m benchmarks.reading --selectors 50000
+"""
+from __future__ import unicode_literals
+
+import codecs
+import shutil
+import tempfile
+import argparse
+
+from Pass import base
+from Pass.base import read_from_file
+from benchmarks.corpus import Corpus
+from benchmarks.expressions import measure
+
+
+def codecs_read_from_file(filename):
+    with codecs.open(filename, 'rb+', 'utf-8') as f:
+        for n, line in enumerate(f, start=1):
+            yield f.name, n, line.rstrip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--selectors', type=int, default=50000, help='number of generated root selectors')
+    parser.add_argument('--repeat', type=int, default=5, help='best of N runs')
+    args = parser.parse_args()
+
+    path = tempfile.mkdtemp()
+    try:
+        filename = Corpus(args.selectors, depth=3, imports=0).write(path)
+        assert list(codecs_read_from_file(filename)) == list(read_from_file(filename))
+        print 'reading %s lines' % len(list(read_from_file(filename)))
+        size = base.MMAP_SIZE
+        for name, function in (('codecs line iteration', lambda: list(codecs_read_from_file(filename))),
+                               ('bulk read', lambda: list(read_from_file(filename))),
+                               ('memory map', lambda: list(read_from_file(filename)))):
+            base.MMAP_SIZE = 0 if name == 'memory map' else float('inf')
+            print '  %-28s %8.2f ms' % (name, measure(function, args.repeat) * 1000)
+        base.MMAP_SIZE = size
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main()
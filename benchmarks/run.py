@@ -0,0 +1,117 @@
+# encoding: utf-8
+"""
+Times compilation of generated stylesheets and compares results.
+
+    python -m benchmarks.run --selectors 100 1000 5000 --output new.json
+    python -m benchmarks.run --selectors 100 1000 5000 --baseline old.json
+    python -m benchmarks.run --compare old.json new.json
+"""
+from __future__ import unicode_literals
+
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+
+from Pass import get_version, process_pass
+from Pass.base import partials
+from Pass.expressions import expressions
+from benchmarks.corpus import Corpus
+
+
+def run_case(corpus, repeat=5, **options):
+    """Returns timings of `process_pass` of generated stylesheet, every run is as cold as a new process."""
+    path = tempfile.mkdtemp()
+    try:
+        filename = corpus.write(path)
+        with open(filename) as f:
+            lines = sum(1 for line in f)
+        times = []
+        for i in range(repeat):
+            expressions.clear()
+            partials.clear()
+            start = time.time()
+            process_pass(filename, **options)
+            times.append(time.time() - start)
+    finally:
+        shutil.rmtree(path)
+    times.sort()
+    return {
+        'name': ' '.join('%s=%s' % item for item in sorted(corpus.params().items())),
+        'params': corpus.params(),
+        'lines': lines,
+        'times': times,
+        'best': times[0],
+        'median': times[len(times) // 2],
+    }
+
+
+def run(corpora, repeat=5, output=sys.stdout, **options):
+    results = {'version': get_version(), 'python': platform.python_version(), 'cases': []}
+    for corpus in corpora:
+        case = run_case(corpus, repeat, **options)
+        output.write('%-90s %8.2f ms\n' % (case['name'], case['median'] * 1000))
+        output.flush()
+        results['cases'].append(case)
+    return results
+
+
+def compare(old, new, threshold=0.1, output=sys.stdout):
+    """
+    Writes median times of cases present in both results.
+    Returns names of cases slower than `threshold` fraction of the old time.
+    """
+    old = dict((case['name'], case) for case in old['cases'])
+    regressions = []
+    for case in new['cases']:
+        if case['name'] not in old:
+            continue
+        before, after = old[case['name']]['median'], case['median']
+        ratio = after / before if before else float('inf')
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(case['name'])
+        output.write('%-90s %8.2f ms %8.2f ms %+7.1f%%%s\n' % (
+            case['name'], before * 1000, after * 1000, (ratio - 1) * 100, '  REGRESSION' if regressed else ''))
+    return regressions
+
+
+def load(filename):
+    with open(filename) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--selectors', type=int, nargs='+', default=[100, 1000, 5000],
+                        help='numbers of root selectors, one case per number')
+    parser.add_argument('--depth', type=int, default=3, help='nesting depth')
+    parser.add_argument('--variables', type=int, default=20, help='number of variables')
+    parser.add_argument('--media', type=float, default=0.1, help='fraction of selectors inside @media')
+    parser.add_argument('--imports', type=float, default=0.1, help='fraction of selectors in imported files')
+    parser.add_argument('--inheritance', type=float, default=0.5, help='fraction of _/- nested selectors')
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    parser.add_argument('--repeat', type=int, default=5, help='median of N runs')
+    parser.add_argument('--output', help='write results to json file')
+    parser.add_argument('--baseline', help='compare results with json file')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two json files and exit')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed slowdown fraction. default 0.1')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(load(args.compare[0]), load(args.compare[1]), args.threshold) else 0)
+    corpora = [Corpus(selectors, args.depth, args.variables, args.media, args.imports, args.inheritance,
+                      seed=args.seed) for selectors in args.selectors]
+    results = run(corpora, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.baseline:
+        sys.exit(1 if compare(load(args.baseline), results, args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+# encoding: utf-8
+"""
+Measures compilation time of deeply nested selectors with comma groups at the root.
+
+    python -m benchmarks.selectors --depth 10 20 40 80
+"""
+from __future__ import unicode_literals
+
+import argparse
+
+from Pass.base import compile_string
+from benchmarks.expressions import measure
+
+
+def nested(depth, width=2, rules=50):
+    """Returns source of `rules` root rules of `width` sibling selectors nested `depth` levels deep."""
+    lines = []
+    for rule in range(rules):
+        lines.extend('.r%s-%s' % (rule, sibling) for sibling in range(width))
+        for level in range(1, depth + 1):
+            lines.append('  ' * level + 'margin-top %spx' % level)
+            lines.append('  ' * level + '-l%s' % level)
+        lines.append('  ' * (depth + 1) + 'float left')
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--depth', type=int, nargs='+', default=[10, 20, 40, 80], help='nesting depths')
+    parser.add_argument('--width', type=int, default=4, help='sibling root selectors')
+    parser.add_argument('--repeat', type=int, default=5, help='best of N runs')
+    args = parser.parse_args()
+
+    for depth in args.depth:
+        source = nested(depth, args.width)
+        print '  depth %-4s %10.2f ms' % (depth, measure(lambda: compile_string(source), args.repeat) * 1000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# encoding: utf-8
+"""
+Compares passing tokens and statements through stages with the former repacking of them on every hop.
+
+    python -m benchmarks.tokens --selectors 5000
+"""
+from __future__ import unicode_literals
+
+import shutil
+import tempfile
+import argparse
+from collections import OrderedDict
+from multiprocessing import Process, Queue
+
+from Pass.base import pipeline_stages, make_pipeline, read_from_file
+from Pass.profiler import max_rss
+from benchmarks.corpus import Corpus
+from benchmarks.expressions import measure
+
+# stages which passed through every token or statement as a new tuple before
+repacking = 'indentation-check', 'imports-check', 'import-files', 'media-check', 'properties', 'vendor-prefixes', \
+            'clearfix', 'clearfix-ie6-7'
+
+
+def repack(function):
+    def stage(lines, compilation):
+        return (tuple(list(item)) for item in function(lines, compilation))
+    return stage
+
+
+def repacking_stages():
+    """Returns registry copy repacking items like the stages did before."""
+    stages = pipeline_stages.copy()
+    stages.stages = [(name, repack(function) if name in repacking else function, optional)
+                     for name, function, optional in stages.stages]
+    return stages
+
+
+def counting_stages(stages, counts):
+    """Returns registry copy counting produced items and new objects among them for every stage."""
+    def count(name, function):
+        def stage(lines, compilation):
+            consumed, alive = set(), []
+            produced = counts.setdefault(name, [0, 0])
+
+            def source():
+                for item in lines:
+                    alive.append(item)
+                    consumed.add(id(item))
+                    yield item
+
+            def produce(items):
+                for item in items:
+                    produced[0] += 1
+                    if id(item) not in consumed:
+                        produced[1] += 1
+                    yield item
+            return produce(function(source(), compilation))
+        return stage
+    registry = stages.copy()
+    registry.stages = [(name, count(name, function), optional) for name, function, optional in stages.stages]
+    return registry
+
+
+def compile(filename, stages):
+    for line in make_pipeline(read_from_file(filename), [], stages=stages):
+        pass
+
+
+def peak_memory(filename, stages, queue):
+    start = max_rss()
+    compile(filename, stages)
+    queue.put(max_rss() - start)
+
+
+def measure_peak_memory(filename, stages):
+    """Returns peak memory growth in kilobytes of compilation in a fresh process."""
+    queue = Queue()
+    process = Process(target=peak_memory, args=(filename, stages, queue))
+    process.start()
+    memory = queue.get()
+    process.join()
+    return memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--selectors', type=int, default=5000, help='number of generated root selectors')
+    parser.add_argument('--repeat', type=int, default=5, help='best of N runs')
+    args = parser.parse_args()
+
+    path = tempfile.mkdtemp()
+    try:
+        filename = Corpus(args.selectors, depth=3).write(path)
+        variants = OrderedDict([('repacking', repacking_stages()), ('passing through', pipeline_stages)])
+        counts = OrderedDict()
+        for name, stages in variants.items():
+            counts[name] = OrderedDict()
+            compile(filename, counting_stages(stages, counts[name]))
+        print 'new objects produced by stage'
+        for stage, (produced, new) in counts['passing through'].items():
+            if stage in repacking:
+                print '  %-20s %8s of %8s, was %8s' % (stage, new, produced, counts['repacking'][stage][1])
+        print 'total new objects %s, was %s' % (
+            sum(new for produced, new in counts['passing through'].values()),
+            sum(new for produced, new in counts['repacking'].values()))
+        for name, stages in variants.items():
+            print '  %-20s %8.2f ms %8s kb peak memory growth' % (
+                name, measure(lambda: compile(filename, stages), args.repeat) * 1000,
+                measure_peak_memory(filename, stages))
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+from __future__ import unicode_literals
+import os
+import shutil
+import tempfile
+import unittest
+from Pass.batch import find_files, compile_files
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write(self, filename, source):
+        filename = os.path.join(self.path, filename)
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        with open(filename, 'w') as f:
+            f.write(source)
+        return filename
+
+    def read(self, filename):
+        with open(os.path.join(self.path, filename)) as f:
+            return f.read()
+
+    def test_find_files(self):
+        a = self.write('a.pass', '')
+        b = self.write('b.pass', '')
+        c = self.write('sub/c.pass', '')
+        self.write('sub/c.css', '')
+        d = self.write('sub/deep/d.pass', '')
+        self.assertEqual(find_files([self.path]), [a, b, c, d])
+        self.assertEqual(find_files([os.path.join(self.path, '*.pass'), b]), [a, b])
+        self.assertEqual(find_files([os.path.join(self.path, 's*'), a]), [c, d, a])
+        self.assertEqual(find_files([c, 'missing.pass']), [c, 'missing.pass'])
+
+    def test_find_files_without_partials(self):
+        self.write('vars.pass', 'size = 2px\n')
+        part = self.write('sub/part.pass', '.part\n  width size\n')
+        style = self.write('style.pass', '@import "vars.pass" "sub/part.pass"\n.style\n  width size\n')
+        self.assertEqual(find_files([self.path]), [style])
+        self.assertEqual(find_files([self.path, part]), [style, part])
+        self.assertEqual(list(compile_files(find_files([self.path]), 3)), [(style, None)])
+        self.assertEqual(self.read('style.css'), '.part{width:2px;}\n.style{width:2px;}\n')
+
+    def test_compile_files(self):
+        filenames = []
+        for i in range(6):
+            filenames.append(self.write('style%s.pass' % i, '.menu%s\n  width %spx\n' % (i, i)))
+        filenames.insert(3, self.write('broken.pass', '.menu\n    width 1px\n'))
+        for jobs in (1, 3):
+            results = list(compile_files(filenames, jobs))
+            self.assertEqual([f for f, error in results], filenames)
+            self.assertEqual([bool(error) for f, error in results], [False] * 3 + [True] + [False] * 3)
+            self.assertIn('IndentationError', results[3][1])
+            for i in range(6):
+                self.assertEqual(self.read('style%s.css' % i), '.menu%s{width:%spx;}\n' % (i, i))
+                os.remove(os.path.join(self.path, 'style%s.css' % i))
+
+    def test_compile_files_options(self):
+        filename = self.write('style.pass', '.menu\n  float left\n')
+        self.assertEqual(list(compile_files([filename], 2, compressed=False)), [(filename, None)])
+        self.assertEqual(self.read('style.css'), '.menu {\n    float: left;\n}\n')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,44 @@
+from __future__ import unicode_literals
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from Pass.base import compile_file
+from benchmarks.corpus import Corpus
+from benchmarks.run import compare
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_corpus(self):
+        corpus = Corpus(selectors=60, depth=4, media=0.3, imports=0.3, inheritance=0.5, seed=1)
+        filename = corpus.write(self.path)
+        with open(filename) as f:
+            source = f.read()
+        self.assertIn('@media', source)
+        self.assertIn('@import', source)
+        css = compile_file(filename)
+        self.assertIn('@media', css)
+        self.assertIn('-part1', css)
+        self.assertEqual(Corpus(selectors=60, depth=4, media=0.3, imports=0.3, inheritance=0.5, seed=1)
+                         .write(os.path.join(self.path, 'again')), os.path.join(self.path, 'again', 'style.pass'))
+        self.assertEqual(compile_file(os.path.join(self.path, 'again', 'style.pass')), css)
+
+    def test_compare(self):
+        old = {'cases': [{'name': 'a', 'median': 1.0}, {'name': 'b', 'median': 1.0}]}
+        new = {'cases': [{'name': 'a', 'median': 1.05}, {'name': 'b', 'median': 1.5}, {'name': 'c', 'median': 1.}]}
+        output = io.StringIO()
+        self.assertEqual(compare(old, new, 0.1, output), ['b'])
+        self.assertEqual(output.getvalue().count('\n'), 2)
+        self.assertIn('REGRESSION', output.getvalue().splitlines()[1])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,120 @@
+from __future__ import unicode_literals
+import os
+import shutil
+import tempfile
+import unittest
+from Pass import base
+from Pass.base import process_pass
+from Pass.cache import CompileCache
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = CompileCache(os.path.join(self.path, 'cache'))
+        self.write('variables.pass', 'size = 1px\n')
+        self.write('style.pass', '@import "variables.pass"\n.menu\n  width size\n')
+        self.make_pipeline = base.make_pipeline
+        self.compiled = 0
+
+    def tearDown(self):
+        base.make_pipeline = self.make_pipeline
+        shutil.rmtree(self.path)
+
+    def write(self, filename, source):
+        filename = os.path.join(self.path, filename)
+        with open(filename, 'w') as f:
+            f.write(source)
+        return filename
+
+    def read(self, filename):
+        with open(os.path.join(self.path, filename)) as f:
+            return f.read()
+
+    def compile(self, filename='style.pass', **options):
+        def make_pipeline(*args, **kwargs):
+            self.compiled += 1
+            return self.make_pipeline(*args, **kwargs)
+        base.make_pipeline = make_pipeline
+        os.remove(self.write('style.css', ''))
+        process_pass(os.path.join(self.path, filename), cache=self.cache, **options)
+        return self.read('style.css')
+
+    def test_cache_hit(self):
+        self.assertEqual(self.compile(), '.menu{width:1px;}\n')
+        self.assertEqual(self.compile(), '.menu{width:1px;}\n')
+        self.assertEqual(self.compiled, 1)
+
+    def test_cache_miss_on_changed_import(self):
+        self.compile()
+        self.write('variables.pass', 'size = 2px\n')
+        self.assertEqual(self.compile(), '.menu{width:2px;}\n')
+        self.assertEqual(self.compiled, 2)
+        self.write('variables.pass', 'size = 1px\n')
+        self.assertEqual(self.compile(), '.menu{width:1px;}\n')
+        self.assertEqual(self.compiled, 2)
+
+    def test_cache_miss_on_changed_options(self):
+        self.compile()
+        self.assertEqual(self.compile(compressed=False), '.menu {\n    width: 1px;\n}\n')
+        self.assertEqual(self.compile(newlines=False), '.menu{width:1px;}')
+        self.assertEqual(self.compiled, 3)
+        self.compile(compressed=False)
+        self.assertEqual(self.compiled, 3)
+
+    def test_cache_evicts_least_recently_used(self):
+        self.cache.max_size = 0
+        self.compile()
+        self.assertEqual(os.listdir(self.cache.path), [])
+        self.cache.max_size = 1024
+        for i in range(3):
+            self.write('variables.pass', 'size = %spx\n' % i)
+            self.compile()
+        for name in os.listdir(self.cache.path):
+            os.utime(os.path.join(self.cache.path, name), (0, 0))
+        options = True, True, False, False, '  ', '    ', True, tuple(base.pipeline_stages.names())
+        filename = os.path.join(self.path, 'style.pass')
+        recent = [self.cache.manifest_path(filename, options),
+                  self.cache.css_path(filename, [os.path.join(self.path, 'variables.pass')], options)]
+        for path in recent:
+            os.utime(path, None)
+        self.cache.max_size = sum(os.path.getsize(path) for path in recent)
+        self.cache.evict()
+        self.assertEqual(sorted(os.listdir(self.cache.path)), sorted(os.path.basename(path) for path in recent))
+        self.assertEqual(self.compile(), '.menu{width:2px;}\n')
+        self.assertEqual(self.compiled, 4)
+
+    def test_cache_hit_keeps_manifest_recent(self):
+        self.compile()
+        for name in os.listdir(self.cache.path):
+            os.utime(os.path.join(self.cache.path, name), (0, 0))
+        self.compile()
+        self.assertEqual(self.compiled, 1)
+        self.assertTrue(all(os.path.getmtime(os.path.join(self.cache.path, name)) > 0
+                            for name in os.listdir(self.cache.path)))
+
+    def test_minified_imports(self):
+        minified = []
+
+        def minify(css):
+            minified.append(css)
+            return css.replace(' ', '')
+
+        cache = base.MinifiedCache()
+        filename = self.write('reset.css', 'a { color: red }')
+        self.assertEqual(cache.get(filename, minify, self.cache), 'a{color:red}')
+        self.assertEqual(cache.get(filename, minify, self.cache), 'a{color:red}')
+        self.assertEqual(cache.get(filename), 'a { color: red }')
+        self.assertEqual((minified, cache.hits), (['a { color: red }'], 1))
+        cache.clear()
+        self.assertEqual(cache.get(filename, minify, self.cache), 'a{color:red}')
+        self.assertEqual(len(minified), 1)
+        self.write('reset.css', 'b { color: red }')
+        self.assertEqual(cache.get(filename, minify, self.cache), 'b{color:red}')
+        self.assertEqual(len(minified), 2)
+        self.assertIsNone(cache.get(self.write('empty.css', ''), minify, self.cache))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,151 @@
+from __future__ import unicode_literals
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from multiprocessing.pool import ThreadPool
+from Pass import base
+from Pass.base import (compile_string, compile_file, generate_css, read_from_file, read_from_string, process_pass,
+                       iter_chunks, write_to_stream)
+
+
+class TestCompile(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write(self, filename, source):
+        filename = os.path.join(self.path, filename)
+        with open(filename, 'w') as f:
+            f.write(source)
+        return filename
+
+    def test_compile_string(self):
+        source = 'line_height = 16px\n.menu\n  margin-bottom line_height/2\n  -item\n    float left\n'
+        css = compile_string(source)
+        self.assertEqual(css, '.menu{margin-bottom:8px;}\n.menu-item{float:left;}\n')
+        css = compile_string(source, compressed=False, css_indent='  ')
+        self.assertEqual(css, '.menu {\n  margin-bottom: 8px;\n}\n.menu-item {\n  float: left;\n}\n')
+
+    def test_compile_string_without_newlines(self):
+        css = compile_string('.menu\n  float left\n.item\n  float right\n', newlines=False)
+        self.assertEqual(css, '.menu{float:left;}.item{float:right;}')
+
+    def test_compile_string_imports(self):
+        self.write('variables.pass', 'size = 2px\n')
+        filename = os.path.join(self.path, 'style.pass')
+        css = compile_string('@import "variables.pass"\n.menu\n  margin-top size\n', filename)
+        self.assertEqual(css, '.menu{margin-top:2px;}\n')
+
+    def test_compile_redefined_variable(self):
+        css = compile_string('size = 1px\n.a\n  width size\nsize = 2px\n.b\n  width size\n')
+        self.assertEqual(css, '.a{width:1px;}\n.b{width:2px;}\n')
+
+    def test_compile_variable_redefined_by_partial(self):
+        self.write('later.pass', 'size = 4px\n')
+        filename = self.write('style.pass', 'size = 3px\n.a\n  width size\n@import "later.pass"\n.b\n  width size\n')
+        self.assertEqual(compile_file(filename), '.a{width:3px;}\n.b{width:4px;}\n')
+
+    def test_compile_imports_partials_in_order(self):
+        self.write('first.pass', 'size = 1px\n.first\n  margin-top size\n')
+        self.write('second.pass', '.second\n  margin-top size\n')
+        filename = self.write('style.pass', '@import "first.pass" "second.pass"\n.style\n  float left\n')
+        self.assertEqual(compile_file(filename),
+                         '.first{margin-top:1px;}\n.second{margin-top:1px;}\n.style{float:left;}\n')
+
+    def test_compile_imports_css_then_partial(self):
+        self.write('reset.css', 'body{margin:0}\n')
+        self.write('variables.pass', 'color = #000\n')
+        filename = self.write('style.pass', '@import "reset.css"\n@import "variables.pass"\n.body\n  color color\n')
+        self.assertEqual(compile_file(filename), 'body{margin:0}\n.body{color:#000;}\n')
+
+    def test_compile_imports_partial_once(self):
+        self.write('menu.pass', 'width = size*2\n.menu\n  margin-top width\n')
+        first = self.write('first.pass', 'size = 1px\n@import "menu.pass"\n.first\n  margin-top width\n')
+        second = self.write('second.pass', 'size = 2px\n@import "menu.pass"\n')
+        base.partials.clear()
+        self.assertEqual(compile_file(first), '.menu{margin-top:2px;}\n.first{margin-top:2px;}\n')
+        self.assertEqual(compile_file(second), '.menu{margin-top:4px;}\n')
+        self.assertEqual((base.partials.misses, base.partials.hits), (1, 1))
+        self.write('menu.pass', '.menu\n  margin-top size\n')
+        self.assertEqual(compile_file(second), '.menu{margin-top:2px;}\n')
+        self.assertEqual((base.partials.misses, base.partials.hits), (2, 1))
+
+    def test_compile_file(self):
+        filename = self.write('style.pass', '.menu\n  color #ffffff\n')
+        self.assertEqual(compile_file(filename), '.menu{color:#fff;}\n')
+        self.assertFalse(os.path.exists(os.path.join(self.path, 'style.css')))
+
+    def test_compile_file_parent(self):
+        self.write('style.pass', '.menu\n  color #f00\n')
+        filename = self.write('child.pass', '@parent "style.pass"\n.child\n  color #00f\n')
+        self.assertEqual(compile_file(filename), '.menu{color:#f00;}\n')
+
+    def test_read_from_file(self):
+        filename = os.path.join(self.path, 'style.pass')
+        with io.open(filename, 'wb') as f:
+            f.write('.menu  \r\n  content "\u2192"\n\n'.encode('utf-8'))
+        lines = [(filename, 1, '.menu'), (filename, 2, '  content "\u2192"'), (filename, 3, '')]
+        self.assertEqual(list(read_from_file(filename)), lines)
+        size, base.MMAP_SIZE = base.MMAP_SIZE, 1
+        try:
+            self.assertEqual(list(read_from_file(filename)), lines)
+        finally:
+            base.MMAP_SIZE = size
+
+    def test_generate_css(self):
+        lines = generate_css(read_from_string('.menu\n  float left\n.item\n  float right\n'))
+        self.assertEqual(next(lines), '.menu{float:left;}')
+        self.assertEqual(list(lines), ['.item{float:right;}'])
+
+    def test_iter_chunks(self):
+        lines = generate_css(read_from_string('.menu\n  content "-"\n'))
+        self.assertEqual(list(iter_chunks(lines, encoding='utf-8')), ['.menu{content:"-";}\n'.encode('utf-8')])
+
+    def test_write_to_stream(self):
+        source = '.menu\n  content "-"\n.item\n  float right\n'
+        text, binary = io.StringIO(), io.BytesIO()
+        write_to_stream(generate_css(read_from_string(source)), text)
+        write_to_stream(generate_css(read_from_string(source)), binary, newlines=False)
+        self.assertEqual(text.getvalue(), compile_string(source))
+        self.assertEqual(binary.getvalue().decode('utf-8'), compile_string(source, newlines=False))
+
+    def test_variables_do_not_leak_between_compilations(self):
+        compile_string('leaked = 1px\n.menu\n  width leaked\n')
+        with self.assertRaises(SyntaxError):
+            compile_string('.menu\n  width leaked\n')
+
+    def test_concurrent_compilations(self):
+        filenames = []
+        for i in range(40):
+            filenames.append(self.write('style%s.pass' % i, (
+                'size = %spx\n'
+                'color_ = #%06x\n'
+                '.menu%s\n'
+                '  width size * 2\n'
+                '  color color_\n'
+                '  -item\n'
+                '    margin-top size + %s\n'
+                '    line-height size / 2\n') % (i + 1, i * 4099, i, i)))
+        serial = [compile_file(filename) for filename in filenames]
+        pool = ThreadPool(8)
+        try:
+            for i in range(5):
+                self.assertEqual(pool.map(compile_file, filenames), serial)
+        finally:
+            pool.close()
+            pool.join()
+
+    def test_process_pass(self):
+        filename = self.write('style.pass', '.menu\n  float left\n')
+        process_pass(filename)
+        with open(os.path.join(self.path, 'style.css')) as f:
+            self.assertEqual(f.read(), compile_file(filename))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
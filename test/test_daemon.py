@@ -0,0 +1,95 @@
+from __future__ import unicode_literals
+import os
+import socket
+import shutil
+import tempfile
+import threading
+import unittest
+from Pass.daemon import Daemon, RequestHandler, request
+
+
+class TestDaemon(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.socket = os.path.join(self.path, 'pass.sock')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write(self, filename, source):
+        filename = os.path.join(self.path, filename)
+        with open(filename, 'w') as f:
+            f.write(source)
+        return filename
+
+    def read(self, filename):
+        with open(os.path.join(self.path, filename)) as f:
+            return f.read()
+
+    def start(self):
+        server = Daemon(self.socket)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.addCleanup(stop)
+        return server
+
+    def test_request(self):
+        self.start()
+        style = self.write('style.pass', '.menu\n  float left\n')
+        broken = self.write('broken.pass', '.menu\n    float left\n')
+        results = request([style, broken], self.socket, compressed=False)
+        self.assertEqual([(f, bool(error)) for f, error in results], [(style, False), (broken, True)])
+        self.assertIn('IndentationError', results[1][1])
+        self.assertEqual(self.read('style.css'), '.menu {\n    float: left;\n}\n')
+
+    def test_request_cache(self):
+        server = self.start()
+        style = self.write('style.pass', '.menu\n  float left\n')
+        cache = os.path.join(self.path, 'cache'), 1024 * 1024
+        for i in range(2):
+            self.assertEqual(request([style], self.socket, cache), [(style, None)])
+        self.assertEqual(len(server.caches), 1)
+        self.assertTrue(os.listdir(cache[0]))
+
+    def test_socket_of_owner_only(self):
+        self.start()
+        self.assertEqual(os.stat(self.socket).st_mode & 0o777, 0o600)
+        style = self.write('style.pass', '.menu\n  float left\n')
+        getuid, os.getuid = os.getuid, lambda: getuid() + 1
+        try:
+            self.assertIsNone(request([style], self.socket))
+            with self.assertRaises(IOError):
+                Daemon(self.socket)
+        finally:
+            os.getuid = getuid
+
+    def test_request_without_daemon(self):
+        self.assertIsNone(request([self.write('style.pass', '')], self.socket))
+
+    def test_empty_request(self):
+        server = self.start()
+        a, b = socket.socketpair()
+        b.close()
+        try:
+            RequestHandler(a, None, server)
+        finally:
+            a.close()
+
+    def test_stale_socket(self):
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.bind(self.socket)
+        s.close()
+        self.start()
+        with self.assertRaises(IOError):
+            Daemon(self.socket)
+        self.assertEqual(request([self.write('style.pass', '.menu\n  float left\n')], self.socket)[0][1], None)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
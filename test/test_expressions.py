@@ -0,0 +1,112 @@
+from __future__ import unicode_literals
+import unittest
+from Pass.base import make_scope, compile_string
+from Pass.expressions import ExpressionCache, parse, expressions
+from Pass.units import Px, Em, Pr
+from Pass.colors import Color
+from Pass.functions import lighten
+
+
+class TestExpressions(unittest.TestCase):
+
+    def setUp(self):
+        self.scope = make_scope()
+        self.scope['size'] = Px(16)
+        self.scope['link'] = Color('1f6ba2')
+
+    def evaluate(self, expression):
+        return parse(expression).evaluate(self.scope)
+
+    def test_literals(self):
+        self.assertEqual(self.evaluate('1'), 1)
+        self.assertEqual(self.evaluate('1.5'), 1.5)
+        self.assertEqual(self.evaluate('.5'), .5)
+        self.assertEqual(self.evaluate('1e2'), 100.)
+        self.assertEqual(self.evaluate('"a\\"b"'), 'a"b')
+        self.assertEqual(self.evaluate("'string'"), 'string')
+        self.assertEqual(str(self.evaluate('1px')), '1px')
+        self.assertEqual(str(self.evaluate('1.5em')), '1.5em')
+        self.assertEqual(str(self.evaluate('2ex')), '2ex')
+        self.assertEqual(str(self.evaluate('10%')), '10%')
+        self.assertEqual(str(self.evaluate('#ffffff')), '#fff')
+        self.assertEqual(str(self.evaluate('#1F6BA2')), '#1f6ba2')
+        self.assertEqual(self.evaluate('auto'), 'auto')
+
+    def test_arithmetic(self):
+        self.assertEqual(self.evaluate('size / 2 + 1px'), Px(9))
+        self.assertEqual(self.evaluate('-size * (1 + 1)'), Px(-32))
+        self.assertEqual(self.evaluate('1em + 2 * 3'), Em(7))
+        self.assertEqual(self.evaluate('7 / 2'), 3)
+        self.assertEqual(self.evaluate('7 % 4 - 2 ** 2'), -1)
+        self.assertEqual(self.evaluate('10 %'.replace(' %', '%')), Pr(10))
+
+    def test_calls(self):
+        self.assertEqual(self.evaluate('max(1px, size / 4, 2px)'), Px(4))
+        self.assertEqual(self.evaluate('round(10.4px)'), Px(10))
+        self.assertEqual(self.evaluate('round(10.44px, 1)'), Px(10.4))
+        self.assertEqual(str(self.evaluate('lighten(link, 10%)')), str(lighten(Color('1f6ba2'), Pr(10))))
+        self.assertEqual(self.evaluate('max([1, 3, 2])'), 3)
+        self.assertEqual(self.evaluate('min(1, 2, key=abs)'), 1)
+        self.assertTrue(self.evaluate('any([0, 1])'))
+
+    def test_mutable_literals_are_not_shared(self):
+        node = parse('round(1.4px)')
+        self.assertEqual(node.evaluate(self.scope), Px(1))
+        self.assertEqual(str(parse('1.4px').evaluate(self.scope)), '1.4px')
+        self.assertIsNot(self.evaluate('#fff'), self.evaluate('#fff'))
+
+    def test_syntax_errors(self):
+        for expression in ('size size', '1pxa', '10%3', '#ffff', '1 +', '(1', 'f(a b)', 'f(a=1, 2)',
+                           'size.value', 'size[0]', 'lambda: 1', 'a = 1', '$'):
+            self.assertRaises(SyntaxError, parse, expression)
+
+    def test_name_errors(self):
+        for expression in ('undefined', '__import__("os")', 'eval("1")', 'open("file")'):
+            self.assertRaises(NameError, self.evaluate, expression)
+
+    def test_limits(self):
+        self.assertEqual(self.evaluate('2 ** 10'), 1024)
+        self.assertEqual(self.evaluate('[0] * 2'), [0, 0])
+        self.assertEqual(self.evaluate('3 * "ab"'), 'ababab')
+        for expression in ('9 ** 9 ** 9', '2 ** 1025', '(9 ** 1024) ** 1024', '10. ** 400',
+                           '[1] * 10 ** 9', '10 ** 9 * "a"', '[1, 2] * 40000'):
+            self.assertRaises(ValueError, self.evaluate, expression)
+        with self.assertRaises(SyntaxError) as e:
+            compile_string('x = 9**9**9\n.menu\n  width 1px\n')
+        self.assertEqual(e.exception.lineno, 1)
+
+
+class TestExpressionCache(unittest.TestCase):
+
+    def test_hits_and_misses(self):
+        cache = ExpressionCache()
+        first = cache('line_height / 2')
+        self.assertIs(cache('line_height / 2'), first)
+        cache('#fff')
+        self.assertEqual(cache.info(), {'hits': 1, 'misses': 2, 'size': 2, 'maxsize': 4096})
+        cache.clear()
+        self.assertEqual(cache.info(), {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 4096})
+
+    def test_least_recently_used_eviction(self):
+        cache = ExpressionCache(maxsize=2)
+        cache('1px')
+        cache('2px')
+        cache('1px')
+        cache('3px')
+        self.assertEqual(list(cache.items), ['1px', '3px'])
+        self.assertRaises(SyntaxError, cache, '1px 1px')
+        self.assertRaises(SyntaxError, cache, '1px 1px')
+        self.assertEqual(list(cache.items), ['3px', '1px 1px'])
+        self.assertEqual(cache.info()['hits'], 2)
+
+    def test_compilation_uses_cache(self):
+        source = 'size = 2px\n' + ''.join('.item%s\n  width size * 2\n  margin-top size\n' % i for i in range(50))
+        compile_string(source)
+        hits = expressions.hits
+        css = compile_string(source)
+        self.assertEqual(expressions.hits - hits, 101)
+        self.assertEqual(css.splitlines()[0], '.item0{width:4px;margin-top:2px;}')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
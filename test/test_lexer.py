@@ -0,0 +1,66 @@
+from __future__ import unicode_literals
+import unittest
+from Pass.base import (read_from_string, ignore_empty_lines, ignore_line_comments, ignore_block_comments,
+                       define_variables, tokenize_selectors_and_properties, lex, make_scope)
+from Pass.utils import consumer
+
+
+@consumer
+def collect(lines):
+    while True:
+        lines.append((yield))
+
+
+class TestLexer(unittest.TestCase):
+
+    source = '''size = 2px
+// line comment
+/* block comment */
+.menu /* inline */
+  margin-top size
+
+\t
+  -item /* multi
+  line // comment
+  */ float left
+  // /* not a block comment
+  clearfix
+  pass
+@import "print.css"
+@media print
+  .menu
+    width   size*2
+    color\t#fff
+'''
+
+    def chain(self, source, scope):
+        target = collect([])
+        lines = read_from_string(source)
+        lines = ignore_empty_lines(lines, target)
+        lines = ignore_line_comments(lines, target)
+        lines = ignore_block_comments(lines, target)
+        lines = define_variables(lines, target, scope)
+        return list(tokenize_selectors_and_properties(lines))
+
+    def test_lex(self):
+        first, second = make_scope(), make_scope()
+        self.assertEqual(list(lex(read_from_string(self.source), first)), self.chain(self.source, second))
+        self.assertEqual(first['size'], second['size'])
+
+    def test_errors(self):
+        for source in ('a =\n', '  b = 1\n', '.menu\n  width x\n1a = 1\n', 'none = 1\n'):
+            with self.assertRaises(SyntaxError):
+                self.chain(source, make_scope())
+            with self.assertRaises(SyntaxError):
+                list(lex(read_from_string(source), make_scope()))
+
+    def test_trivia(self):
+        trivia = []
+        tokens = list(lex(read_from_string(self.source), make_scope(), target=collect(trivia)))
+        self.assertEqual(len(tokens), 12)
+        self.assertEqual([n for f, n, line in trivia], [1, 2, 3, 4, 6, 7, 8, 9, 10, 11])
+        self.assertEqual(trivia[3], (None, 4, '.menu'))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,81 @@
+from __future__ import unicode_literals
+import unittest
+from Pass.cssmin import cssmin
+from Pass.minify import minify, minify_chunks, segments
+from benchmarks.minify import vendor_stylesheet
+
+# stylesheets minified by the cascade in its own peculiar ways
+corpus = [
+    '',
+    '  \n\t ',
+    'a { border-color: #AABBCC  #ddeeff; b: 1px solid #ddeeff }',
+    'p :link, a:hover { margin : 0Px 0 0 0 ; x: 0.50em; y:0in; z: 00.5; w: 0% }',
+    '@media screen and (max-width:100px) { a :hover{b:c} }  @media screen and(max-width:1px){a{b:c}}',
+    ' a{b:c;;;} ;; d{background-position: 0 0 0 0; margin:0 0;padding:0 0 0;top:0 0}',
+    'a{background-position:0;xbackground-position:0 0;margin:0 0}',
+    '/*! keep  me : x */ a /* drop */ { color : red } /*! b /* c */ d{e:f}',
+    'a{b:0/**/.5;c:#aa/**/bbcc;d:0/* x */Px} a/**/:hover{}',
+    'a{b:c}/* unclosed',
+    'a{content:"\\"}\\"";b:c}  x:y{z:w}',
+    ':root{a:b}x :y{z:w}a{b:c}}}} :x y:z{}',
+    '.a:not(:hover) > b + c ~ d [ e ] { f : g !important ; h : calc( 1px + 2px ) }',
+    'a{x:#aabbcc#ddeeff;y:#aabbcc #aabbcc; z: c #aabbcc; w: #aabbccdd #AAbbcc}',
+    'a{x:1px solid #dddddd}b{y:#aaaaad #dddddd;z:#ffffff #dddddd}c{w:#ffffff #dddddd;v:#ffffff #dddddd}',
+    'a{filter:progid:DXImageTransform.Microsoft.gradient(startColorstr=\'#80000000\', endColorstr=#80000000)}',
+    'a{b:url( a/b.png ) ; c : "x , y" ; d:url(data:image/png;base64,AAA=)}',
+    'a{b:from_rgb(51, 102, 153)}',
+    '@charset "utf-8"; a{b:c} @charset "latin1";',
+    '/* \\*/ a{b:c} /* */ d{e:f}',
+    'a{b:0%and(x)}',
+]
+
+
+class TestMinify(unittest.TestCase):
+
+    def test_corpus(self):
+        for css in corpus:
+            self.assertEqual(minify(css), cssmin(css), css)
+
+    def test_colors(self):
+        # a color right after a matched one is left as is wherever else the same color is shortened
+        css = 'a{x:1px solid #dddddd}b{y:#aaaaad #dddddd;z:from_rgb(255, 0, 17)}'
+        self.assertEqual(cssmin(css), 'a{x:1px solid #ddd}b{y:#aaaaad #dddddd;z:#f01}')
+        self.assertEqual(minify(css), cssmin(css))
+
+    def test_conjunction(self):
+        # space goes into `and(` before zero units are condensed
+        css = 'a{b:0%and(x)}'
+        self.assertEqual(cssmin(css), 'a{b:0and (x)}')
+        self.assertEqual(minify(css), cssmin(css))
+
+    def test_wrap(self):
+        css = 'a{b:c}\nd{e:f}\ng{h:i}'
+        self.assertEqual(minify(css, wrap=6), cssmin(css, wrap=6))
+
+    def test_vendor_stylesheet(self):
+        for seed in range(3):
+            css = vendor_stylesheet(20000, seed)
+            self.assertEqual(minify(css), cssmin(css))
+
+    def test_chunks(self):
+        for css in corpus:
+            if '@charset' not in css:
+                for size in (1, 8):
+                    chunks = [css[i:i + 3] for i in range(0, len(css), 3)]
+                    self.assertEqual(''.join(minify_chunks(chunks, size=size)), cssmin(css), css)
+
+    def test_chunks_of_vendor_stylesheet(self):
+        css = vendor_stylesheet(50000)
+        chunks = [css[i:i + 100] for i in range(0, len(css), 100)]
+        self.assertLess(max(map(len, segments(chunks, 1000))), 2000)
+        self.assertEqual(''.join(minify_chunks(chunks, size=1000)), cssmin(css))
+        self.assertEqual(''.join(minify_chunks(chunks, wrap=80, size=1000)), cssmin(css, wrap=80))
+
+    def test_segments(self):
+        # no cut before comments, within the box model hack, or before colon of selector
+        css = 'a{b:c}/* } */d{e:"\\"}\\""}f}g:hover{h:i}:j{k:l}m{n:o}'
+        self.assertEqual(list(segments([css], 1)), ['a{b:c}/* } */d{e:"\\"}\\""}f}', 'g:hover{h:i}:j{k:l}', 'm{n:o}'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,44 @@
+from __future__ import unicode_literals
+import io
+import unittest
+from Pass.base import generate_css, read_from_string, compile_string, pipeline_stages
+from Pass.profiler import StageProfiler
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_wrap(self):
+        profiler = StageProfiler()
+
+        def source():
+            for i in range(10):
+                yield i
+
+        def evens(lines):
+            for line in lines:
+                if line % 2 == 0:
+                    yield line
+
+        lines = profiler.wrap(evens(profiler.wrap(source())))
+        self.assertEqual(list(lines), [0, 2, 4, 6, 8])
+        self.assertEqual(list(profiler.stages), ['source', 'evens'])
+        self.assertEqual([(s.items_in, s.items_out) for s in profiler.stages.values()], [(0, 10), (10, 5)])
+        self.assertTrue(all(s.time >= 0 for s in profiler.stages.values()))
+
+    def test_pipeline(self):
+        source = 'size = 2px\n.menu\n  margin-top size\n  -item\n    float left\n'
+        profiler = StageProfiler()
+        css = ''.join(line + '\n' for line in generate_css(read_from_string(source), profiler=profiler))
+        self.assertEqual(css, compile_string(source))
+        stages = profiler.stages
+        self.assertEqual(list(stages), ['read'] + pipeline_stages.names())
+        self.assertEqual((stages['lex'].items_in, stages['lex'].items_out), (5, 5))
+        self.assertEqual(stages['css'].items_out, 2)
+        output = io.StringIO()
+        profiler.report(output)
+        self.assertIn('vendor-prefixes', output.getvalue())
+        self.assertEqual(len(output.getvalue().splitlines()), len(stages) + 2)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
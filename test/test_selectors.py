@@ -0,0 +1,32 @@
+from __future__ import unicode_literals
+import unittest
+from Pass.base import SelectorPath, combine_selectors, lex, make_scope, read_from_string, compile_string
+
+
+class TestSelectors(unittest.TestCase):
+
+    def test_path(self):
+        root = SelectorPath('.menu')
+        item, link = SelectorPath('-item', root), SelectorPath(' a', root)
+        self.assertIs(item.parent, link.parent)
+        self.assertEqual(item, ['.menu', '-item'])
+        self.assertEqual(len(link), 2)
+        self.assertEqual(list(link), ['.menu', ' a'])
+        self.assertEqual(link[-1], ' a')
+        self.assertNotEqual(item, link)
+
+    def test_shared_prefixes(self):
+        source = '.a\n.b\n  -c\n  -d\n    float left\n'
+        lines = list(combine_selectors(lex(read_from_string(source), make_scope())))
+        selectors = [line[0] for line in lines if line[1]]
+        self.assertEqual(selectors, [['.a', '-c'], ['.b', '-c'], ['.a', '-d'], ['.b', '-d']])
+        self.assertIs(selectors[0].parent, selectors[2].parent)
+        self.assertEqual(compile_string(source), '.a-c,.b-c,.a-d,.b-d{float:left;}\n')
+
+    def test_deep_nesting(self):
+        source = ''.join('  ' * i + '-n%s\n' % i for i in range(30)) + '  ' * 30 + 'float left\n'
+        self.assertEqual(compile_string(source), ''.join('-n%s' % i for i in range(30)) + '{float:left;}\n')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,120 @@
+from __future__ import unicode_literals
+import unittest
+from Pass.base import compile_string, pipeline_stages, StageRegistry
+
+
+def drop_floats(lines, compilation):
+    for media, selectors, declarations in lines:
+        yield media, selectors, [(prop, value) for prop, value in declarations if prop != 'float']
+
+
+class TestStages(unittest.TestCase):
+
+    source = '.menu\n  clearfix\n  float left\n  border-radius 2px\n'
+
+    def test_default_stages(self):
+        self.assertEqual(compile_string(self.source), (
+            '.menu{float:left;-webkit-border-radius:2px;border-radius:2px;}\n'
+            '.menu:before{content:" ";display:table;}\n'
+            '.menu:after{content:" ";display:table;clear:both;}\n'
+            '.menu{*zoom:1;}\n'))
+
+    def test_disable(self):
+        stages = pipeline_stages.copy()
+        stages.disable('vendor-prefixes', 'clearfix-ie6-7')
+        self.assertEqual(compile_string(self.source, stages=stages), (
+            '.menu{float:left;border-radius:2px;}\n'
+            '.menu:before{content:" ";display:table;}\n'
+            '.menu:after{content:" ";display:table;clear:both;}\n'))
+        self.assertIn('vendor-prefixes', pipeline_stages.names())
+        stages.enable('vendor-prefixes')
+        self.assertIn('-webkit-border-radius', compile_string(self.source, stages=stages))
+
+    def test_clearfix_ie6_7_only_after_clearfix(self):
+        source = '.box:after\n  content " "\n  display table\n  clear both\n'
+        self.assertEqual(compile_string(source), '.box:after{content:" ";display:table;clear:both;}\n')
+
+    def test_disable_inheritance(self):
+        source = '.menu\n  -item\n    float left\n    _active\n      color #000\n'
+        stages = pipeline_stages.copy()
+        self.assertIn('.menu-item_active{float:left;color:#000;}', compile_string(source, stages=stages))
+        stages.disable('inheritance')
+        self.assertEqual(compile_string(source, stages=stages),
+                         '.menu-item{float:left;}\n.menu-item_active{color:#000;}\n')
+
+    def test_filter_properties(self):
+        source = ('.menu\n  color #000\n  display -webkit-box\n  display flex\n  margin 0\n'
+                  '  color #fff\n  margin 0 auto\n')
+        self.assertEqual(compile_string(source),
+                         '.menu{display:-webkit-box;display:flex;color:#fff;margin:0 auto;}\n')
+        stages = pipeline_stages.copy()
+        stages.disable('filter-properties')
+        self.assertEqual(compile_string(source, stages=stages),
+                         '.menu{color:#000;display:-webkit-box;display:flex;margin:0;color:#fff;margin:0 auto;}\n')
+
+    def test_shorthands(self):
+        source = ('.a\n  margin-top 0\n  margin-right 8px\n  margin-bottom 0\n  margin-left 8px\n  color #fff\n'
+                  '.b\n  padding-top 1px\n  padding-right 2px\n  padding-bottom 3px\n  padding-left 2px\n'
+                  '.c\n  border-width 1px\n  border-top-color #fff\n  border-right-color #000\n'
+                  '  border-bottom-color #fff\n  border-left-color #000\n'
+                  '.d\n  margin 0\n  margin-top 1px\n  margin-right 1px\n  margin-bottom 1px\n  margin-left 1px\n')
+        self.assertNotIn('shorthands', pipeline_stages.names())
+        stages = pipeline_stages.copy()
+        stages.enable('shorthands')
+        self.assertEqual(compile_string(source, stages=stages), (
+            '.a{margin:0 8px;color:#fff;}\n'
+            '.b{padding:1px 2px 3px;}\n'
+            '.c{border-width:1px;border-color:#fff #000;}\n'
+            '.d{margin:0;margin-top:1px;margin-right:1px;margin-bottom:1px;margin-left:1px;}\n'))
+        self.assertIn('    margin: 0 8px;\n', compile_string(source, compressed=False, stages=stages))
+
+    def test_merge_rules(self):
+        source = ('.a\n  color #000\n.b\n  margin 0\n.c\n  color #000\n.d\n  margin-left 1px\n.e\n  margin 0\n'
+                  '.e\n  color #fff\n.f::-moz-selection\n  color #fff\n.f::selection\n  color #fff\n')
+        self.assertNotIn('merge-rules', pipeline_stages.names())
+        stages = pipeline_stages.copy()
+        stages.enable('merge-rules')
+        self.assertEqual(compile_string(source, stages=stages), (
+            '.a,.c{color:#000;}\n'
+            '.b{margin:0;}\n'
+            '.d{margin-left:1px;}\n'
+            '.e{margin:0;color:#fff;}\n'
+            '.f::-moz-selection{color:#fff;}\n'
+            '.f::selection{color:#fff;}\n'))
+
+    def test_merge_rules_pseudos(self):
+        source = ('.a:hover\n  color #000\n.b:before\n  color #000\n.c:focus-visible\n  color #000\n'
+                  '.d:is(.e)\n  color #000\n.f::placeholder\n  color #000\n')
+        stages = pipeline_stages.copy()
+        stages.enable('merge-rules')
+        self.assertEqual(compile_string(source, stages=stages), (
+            '.a:hover,.b:before{color:#000;}\n'
+            '.c:focus-visible{color:#000;}\n'
+            '.d:is(.e){color:#000;}\n'
+            '.f::placeholder{color:#000;}\n'))
+
+    def test_insert(self):
+        stages = pipeline_stages.copy()
+        stages.insert('drop-floats', drop_floats, before='vendor-prefixes')
+        names = stages.names()
+        self.assertEqual(names.index('drop-floats') + 1, names.index('vendor-prefixes'))
+        self.assertNotIn('float', compile_string(self.source, stages=stages))
+        stages.remove('drop-floats')
+        self.assertEqual(stages.names(), pipeline_stages.names())
+
+    def test_errors(self):
+        stages = StageRegistry([('a', drop_floats, False)])
+        with self.assertRaises(ValueError):
+            stages.disable('a')
+        with self.assertRaises(ValueError):
+            stages.remove('a')
+        with self.assertRaises(ValueError):
+            stages.insert('a', drop_floats)
+        with self.assertRaises(KeyError):
+            stages.disable('missing')
+        with self.assertRaises(KeyError):
+            stages.insert('b', drop_floats, after='missing')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
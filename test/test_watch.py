@@ -0,0 +1,79 @@
+from __future__ import unicode_literals
+import os
+import shutil
+import tempfile
+import unittest
+from Pass.watch import Watcher
+
+
+class TestWatch(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.realpath(tempfile.mkdtemp())
+        self.mtime = 1000000000
+        self.write('variables.pass', 'size = 1px\n')
+        self.write('nav.pass', '@import "variables.pass"\n.nav\n  width size\n')
+        self.write('a.pass', '@import "variables.pass"\n.a\n  width size\n')
+        self.write('b.pass', '.b\n  width 2px\n')
+        self.write('c.pass', '@import "nav.pass"\n.c\n  width 3px\n')
+        self.write('d.pass', '@parent "c.pass"\n')
+        self.watcher = Watcher(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write(self, filename, source):
+        filename = os.path.join(self.path, filename)
+        with open(filename, 'w') as f:
+            f.write(source)
+        self.mtime += 10
+        os.utime(filename, (self.mtime, self.mtime))
+        return filename
+
+    def read(self, filename):
+        with open(os.path.join(self.path, filename)) as f:
+            return f.read()
+
+    def names(self, results):
+        return [(os.path.basename(filename), error is None) for filename, error in results]
+
+    def test_start(self):
+        self.assertEqual(self.names(self.watcher.start()), [('a.pass', True), ('b.pass', True), ('c.pass', True)])
+        self.assertEqual(self.read('a.css'), '.a{width:1px;}\n')
+        self.assertEqual(self.read('c.css'), '.nav{width:1px;}\n.c{width:3px;}\n')
+        self.assertFalse(os.path.exists(os.path.join(self.path, 'variables.css')))
+        self.assertFalse(os.path.exists(os.path.join(self.path, 'nav.css')))
+        self.assertFalse(os.path.exists(os.path.join(self.path, 'd.css')))
+
+    def test_poll_rebuilds_dependent_entries(self):
+        self.watcher.start()
+        self.assertEqual(self.watcher.poll(), [])
+        self.write('variables.pass', 'size = 10px\n')
+        self.assertEqual(self.names(self.watcher.poll()), [('a.pass', True), ('c.pass', True)])
+        self.assertEqual(self.read('c.css'), '.nav{width:10px;}\n.c{width:3px;}\n')
+        self.write('b.pass', '.b\n  width 20px\n')
+        self.assertEqual(self.names(self.watcher.poll()), [('b.pass', True)])
+        self.write('d.pass', '@parent "c.pass"\n\n')
+        self.assertEqual(self.names(self.watcher.poll()), [('c.pass', True)])
+
+    def test_poll_ignores_unrelated_files(self):
+        self.watcher.start()
+        self.write('notes.txt', 'size = 10px\n')
+        self.write('unused.css', '.unused{}')
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_poll_new_and_broken_files(self):
+        self.watcher.start()
+        self.write('e.pass', '@import "variables.pass"\n.e\n  width size\n')
+        self.assertEqual(self.names(self.watcher.poll()), [('e.pass', True)])
+        self.write('variables.pass', 'size = \n')
+        self.assertEqual(self.names(self.watcher.poll()),
+                         [('a.pass', False), ('c.pass', False), ('e.pass', False)])
+        self.write('variables.pass', 'size = 5px\n')
+        self.assertEqual(self.names(self.watcher.poll()),
+                         [('a.pass', True), ('c.pass', True), ('e.pass', True)])
+        self.assertEqual(self.read('e.css'), '.e{width:5px;}\n')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)